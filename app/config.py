@@ -1,8 +1,15 @@
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 from functools import lru_cache
 
 
+class MonitorTarget(BaseModel):
+    url: str
+    interval_seconds: float = 60.0
+    jitter_seconds: float = 5.0
+
+
 class Settings(BaseSettings):
     # Application
     app_name: str = "Government Portal - Defacement Testing"
@@ -21,17 +28,97 @@ class Settings(BaseSettings):
         "http://localhost:3000",
     ]
     
+    # Templates (no cache dir: a per-user folder in the temp dir)
+    template_bytecode_cache: bool = True
+    template_cache_dir: Optional[str] = None
+    # Compile every template at startup; off, each compiles on first render (shorter cold starts)
+    template_warmup: bool = True
+    page_cache_enabled: bool = True
+    page_cache_version: str = "1"
+    page_cache_check_interval: float = 1.0
+    page_cache_brotli: bool = True
+    
+    # Static Files
+    static_precompress: bool = True
+    static_brotli: bool = True
+    
     # Rate Limiting
     rate_limit_enabled: bool = True
     rate_limit_times: int = 100
     rate_limit_seconds: int = 60
+    rate_limit_backend: str = "memory"
+    rate_limit_redis_url: str = "redis://localhost:6379/0"
+    rate_limit_max_keys: int = 100000
+    rate_limit_trust_forwarded: bool = False
+    rate_limit_trusted_hops: int = 1
+    rate_limit_exempt: List[str] = ["127.0.0.1", "::1"]
+    rate_limit_costs: Dict[str, float] = {
+        "GET /static/*": 0,
+        "POST /api/contact": 5,
+        "POST /api/defacement/check": 20,
+        "POST /api/defacement/baseline/create": 30,
+    }
+    
+    # API Response Cache
+    api_cache_enabled: bool = True
+    api_cache_max_entries: int = 1024
+    
+    # Search (typo tolerance is one edit, for query tokens of at least search_min_typo_length)
+    search_min_prefix_length: int = 2
+    search_max_expansions: int = 64
+    search_min_typo_length: int = 4
+    search_max_total: int = 1000
+    
+    # Contact Submissions
+    submissions_file: str = "data/submissions.jsonl"
+    submissions_max_pending: int = 10000
+    submissions_batch_size: int = 256
+    submissions_durable_ack: bool = True
+    
+    # Defacement Detection
+    detector_fetch_timeout: float = 5.0
+    detector_max_workers: int = 4
+    detector_max_connections: int = 20
+    detector_conditional_get: bool = True
+    detector_conditional_max_age: float = 300.0
+    hash_cache_enabled: bool = True
+    hash_cache_paranoid: bool = False
+    hash_cache_verify_rate: float = 0.05
+    asset_chunking_enabled: bool = False
+    asset_chunking_stop_at_first: bool = False
+    asset_chunking_max_file_size: int = 8 * 1024 * 1024
+    baseline_history_size: int = 10
+    crawl_max_pages: int = 500
+    crawl_concurrency: int = 16
+    crawl_per_host_limit: int = 8
+    verify_shard_threshold: int = 2000
+    verify_process_workers: int = 4
+    
+    # Background Monitoring
+    monitor_enabled: bool = True
+    monitor_targets: List[MonitorTarget] = [MonitorTarget(url="http://localhost:9000")]
+    monitor_max_concurrency: int = 4
+    watch_enabled: bool = False
+    watch_debounce_seconds: float = 0.2
     
     # Security
     secret_key: str = "your-secret-key-change-in-production"
+    request_id_mode: str = "counter"
+    admin_token: Optional[str] = None
     
     # Logging
     log_level: str = "INFO"
     
+    # Metrics (Prometheus text format at /metrics)
+    metrics_enabled: bool = True
+    
+    # Profiling (X-Profile: 1 with an admin token, or a sampled fraction of requests under profiling_paths)
+    profiling_sample_rate: float = 0.0
+    profiling_paths: List[str] = ["/api/defacement/"]
+    profiling_interval: float = 0.005
+    profiling_max_duration: float = 30.0
+    profiling_max_profiles: int = 20
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,16 +1,93 @@
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict, Iterable, Iterator, Union
 from datetime import datetime
-from app.models import Department, Service, ContactSubmission, DepartmentCategory, ServiceCategory
+from bisect import bisect_right, insort
+from app.models import Department, Service, DepartmentCategory, ServiceCategory
+from app.utils.lazy import Provider
+
+
+Row = Union[Department, Service]
+Listener = Callable[[str, Optional[Row], Optional[Row]], None]
+
+
+def _key(value) -> str:
+    """Index key for enum or plain string values"""
+    return getattr(value, 'value', value)
 
 
 class MockDatabase:
-    """Mock database for demonstration purposes"""
+    """Mock database for demonstration purposes
+    
+    Departments and services are indexed by id, and services also by
+    category, department_id and is_online, so lookups and filtered queries
+    touch only the matching rows. Each index bucket is an insertion-ordered
+    id -> row dict, so results keep insertion order. A sorted id list backs
+    cursor pagination in id order. Indexes are updated by the add/update/remove
+    methods, which are the only supported way to mutate the catalog.
+    
+    Every mutation bumps ``version``, so callers can cache anything derived
+    from the data under that version. Listeners registered with
+    add_listener() are called as ``listener(kind, old, new)`` after each
+    row change ("department" or "service"; old or new is None for adds and
+    removes) and as ``listener(kind, None, None)`` after a bulk load.
+    """
+    
+    def __init__(self, departments: Optional[Iterable[Department]] = None,
+                 services: Optional[Iterable[Service]] = None):
+        self.version = 0
+        self.updated_at = datetime.now()
+        self._listeners: List[Listener] = []
+        self.load_departments(self._init_departments() if departments is None else departments)
+        self.load_services(self._init_services() if services is None else services)
+    
+    def load_departments(self, departments: Iterable[Department]):
+        """Replace all departments and rebuild their index"""
+        self._departments_by_id: Dict[int, Department] = {}
+        self._departments_list: Optional[List[Department]] = None
+        for department in departments:
+            self._departments_by_id[department.id] = department
+        self._department_ids: List[int] = sorted(self._departments_by_id)
+        self._touch()
+        self._notify("department", None, None)
+    
+    def load_services(self, services: Iterable[Service]):
+        """Replace all services and rebuild their indexes"""
+        self._services_by_id: Dict[int, Service] = {}
+        self._services_by_category: Dict[str, Dict[int, Service]] = {}
+        self._services_by_department: Dict[int, Dict[int, Service]] = {}
+        self._services_by_online: Dict[bool, Dict[int, Service]] = {True: {}, False: {}}
+        self._services_list: Optional[List[Service]] = None
+        for service in services:
+            self._index_service(service)
+        self._service_ids: List[int] = sorted(self._services_by_id)
+        self._touch()
+        self._notify("service", None, None)
     
-    def __init__(self):
-        self.departments: List[Department] = self._init_departments()
-        self.services: List[Service] = self._init_services()
-        self.contact_submissions: List[ContactSubmission] = []
-        self._submission_counter = 1
+    def _touch(self):
+        self.version += 1
+        self.updated_at = datetime.now()
+    
+    def add_listener(self, listener: Listener):
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Listener):
+        self._listeners.remove(listener)
+    
+    def _notify(self, kind: str, old: Optional[Row], new: Optional[Row]):
+        for listener in self._listeners:
+            listener(kind, old, new)
+    
+    @property
+    def departments(self) -> List[Department]:
+        # Rebuilt lazily after a mutation, so reads stay O(1) in between
+        if self._departments_list is None:
+            self._departments_list = list(self._departments_by_id.values())
+        return self._departments_list
+    
+    @property
+    def services(self) -> List[Service]:
+        if self._services_list is None:
+            self._services_list = list(self._services_by_id.values())
+        return self._services_list
     
     def _init_departments(self) -> List[Department]:
         return [
@@ -240,33 +317,184 @@ class MockDatabase:
             )
         ]
     
+    def _index_service(self, service: Service):
+        self._services_by_id[service.id] = service
+        for bucket in self._service_buckets(service):
+            bucket[service.id] = service
+        self._services_list = None
+    
+    def _service_buckets(self, service: Service) -> List[Dict[int, Service]]:
+        return [
+            self._services_by_category.setdefault(_key(service.category), {}),
+            self._services_by_department.setdefault(service.department_id, {}),
+            self._services_by_online[service.is_online],
+        ]
+    
+    def _unindex_service(self, service: Service):
+        del self._services_by_id[service.id]
+        for index, key in ((self._services_by_category, _key(service.category)),
+                           (self._services_by_department, service.department_id)):
+            bucket = index[key]
+            del bucket[service.id]
+            if not bucket:
+                del index[key]
+        del self._services_by_online[service.is_online][service.id]
+        self._services_list = None
+    
     def get_all_departments(self) -> List[Department]:
         return self.departments
     
+    def count_departments(self) -> int:
+        return len(self._departments_by_id)
+    
     def get_department_by_id(self, dept_id: int) -> Optional[Department]:
-        return next((d for d in self.departments if d.id == dept_id), None)
+        return self._departments_by_id.get(dept_id)
     
-    def get_all_services(self, category: Optional[str] = None, department_id: Optional[int] = None) -> List[Service]:
-        services = self.services
-        
+    def add_department(self, department: Department) -> Department:
+        if department.id in self._departments_by_id:
+            raise ValueError(f"Department {department.id} already exists")
+        self._departments_by_id[department.id] = department
+        insort(self._department_ids, department.id)
+        self._departments_list = None
+        self._touch()
+        self._notify("department", None, department)
+        return department
+    
+    def update_department(self, department: Department) -> Department:
+        current = self._departments_by_id.get(department.id)
+        if current is None:
+            raise KeyError(department.id)
+        self._departments_by_id[department.id] = department
+        self._departments_list = None
+        self._touch()
+        self._notify("department", current, department)
+        return department
+    
+    def remove_department(self, dept_id: int) -> Optional[Department]:
+        department = self._departments_by_id.pop(dept_id, None)
+        if department is not None:
+            self._department_ids.pop(bisect_right(self._department_ids, dept_id) - 1)
+            self._departments_list = None
+            self._touch()
+            self._notify("department", department, None)
+        return department
+    
+    def iter_departments(self, after_id: Optional[int] = None) -> Iterator[Department]:
+        """Departments in ascending id order, starting after after_id"""
+        ids = self._department_ids
+        start = 0 if after_id is None else bisect_right(ids, after_id)
+        for index in range(start, len(ids)):
+            department = self._departments_by_id.get(ids[index])
+            if department is not None:
+                yield department
+    
+    def _filter_buckets(self, category: Optional[str], department_id: Optional[int],
+                        is_online: Optional[bool]) -> List[Dict[int, Service]]:
+        buckets = []
         if category:
-            services = [s for s in services if s.category == category]
-        
+            buckets.append(self._services_by_category.get(_key(category), {}))
         if department_id:
-            services = [s for s in services if s.department_id == department_id]
+            buckets.append(self._services_by_department.get(department_id, {}))
+        if is_online is not None:
+            buckets.append(self._services_by_online[is_online])
+        return buckets
+    
+    def get_all_services(self, category: Optional[str] = None, department_id: Optional[int] = None,
+                         is_online: Optional[bool] = None) -> List[Service]:
+        """Services matching every given filter, found by intersecting the indexes"""
+        buckets = self._filter_buckets(category, department_id, is_online)
+        if not buckets:
+            return self.services
+        if len(buckets) == 1:
+            return list(buckets[0].values())
         
-        return services
+        # Walk the smallest bucket and probe the others
+        buckets.sort(key=len)
+        smallest, rest = buckets[0], buckets[1:]
+        return [
+            service for service_id, service in smallest.items()
+            if all(service_id in bucket for bucket in rest)
+        ]
+    
+    def count_services(self, category: Optional[str] = None, department_id: Optional[int] = None,
+                       is_online: Optional[bool] = None) -> int:
+        """Number of services matching the filters, without building the result list"""
+        buckets = self._filter_buckets(category, department_id, is_online)
+        if not buckets:
+            return len(self._services_by_id)
+        buckets.sort(key=len)
+        smallest, rest = buckets[0], buckets[1:]
+        if not rest:
+            return len(smallest)
+        return sum(1 for service_id in smallest if all(service_id in bucket for bucket in rest))
+    
+    def iter_services(self, category: Optional[str] = None, department_id: Optional[int] = None,
+                      is_online: Optional[bool] = None, after_id: Optional[int] = None) -> Iterator[Service]:
+        """Matching services in ascending id order, starting after after_id
+        
+        Walks the sorted id list lazily, so taking the first N rows costs
+        O(N) plus the non-matching rows skipped on the way.
+        """
+        buckets = self._filter_buckets(category, department_id, is_online)
+        ids = self._service_ids
+        services_by_id = self._services_by_id
+        start = 0 if after_id is None else bisect_right(ids, after_id)
+        for index in range(start, len(ids)):
+            service_id = ids[index]
+            if all(service_id in bucket for bucket in buckets):
+                # A stream may still be reading while a row is removed
+                service = services_by_id.get(service_id)
+                if service is not None:
+                    yield service
     
     def get_service_by_id(self, service_id: int) -> Optional[Service]:
-        return next((s for s in self.services if s.id == service_id), None)
-    
-    def add_contact_submission(self, submission: ContactSubmission) -> ContactSubmission:
-        submission.id = self._submission_counter
-        submission.submitted_at = datetime.now()
-        self._submission_counter += 1
-        self.contact_submissions.append(submission)
-        return submission
+        return self._services_by_id.get(service_id)
+    
+    def add_service(self, service: Service) -> Service:
+        if service.id in self._services_by_id:
+            raise ValueError(f"Service {service.id} already exists")
+        self._index_service(service)
+        insort(self._service_ids, service.id)
+        self._touch()
+        self._notify("service", None, service)
+        return service
+    
+    def update_service(self, service: Service) -> Service:
+        """Replace the service with the same id, moving it between index buckets as needed"""
+        current = self._services_by_id.get(service.id)
+        if current is None:
+            raise KeyError(service.id)
+        if (_key(current.category), current.department_id, current.is_online) == \
+                (_key(service.category), service.department_id, service.is_online):
+            # Same buckets: swap the row in place and keep its position
+            self._services_by_id[service.id] = service
+            for bucket in self._service_buckets(service):
+                bucket[service.id] = service
+            self._services_list = None
+        else:
+            self._unindex_service(current)
+            self._index_service(service)
+        self._touch()
+        self._notify("service", current, service)
+        return service
+    
+    def remove_service(self, service_id: int) -> Optional[Service]:
+        service = self._services_by_id.get(service_id)
+        if service is not None:
+            self._unindex_service(service)
+            self._service_ids.pop(bisect_right(self._service_ids, service_id) - 1)
+            self._touch()
+            self._notify("service", service, None)
+        return service
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Catalog counters, read straight from the index sizes"""
+        return {
+            "total_departments": len(self._departments_by_id),
+            "total_services": len(self._services_by_id),
+            "online_services": len(self._services_by_online[True]),
+        }
 
 
-# Global database instance
-db = MockDatabase()
+# Global database instance, seeded on first use rather than at import
+get_db = Provider(MockDatabase)
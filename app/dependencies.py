@@ -0,0 +1,22 @@
+"""
+Shared route dependencies
+"""
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.config import settings
+
+
+def is_admin(token: Optional[str]) -> bool:
+    """True if token is ADMIN_TOKEN; always False when no token is configured"""
+    if not settings.admin_token or not token:
+        return False
+    return hmac.compare_digest(token, settings.admin_token)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Allow the request only if it carries ADMIN_TOKEN; admin endpoints are closed without one"""
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
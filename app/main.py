@@ -1,6 +1,4 @@
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
@@ -8,11 +6,19 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
 from datetime import datetime
 
+from app.routes.api import router as api_router, get_submission_store
 from app.routes.basic import router as basic_router
+from app.routes.debug import router as debug_router, profile_store
 from app.routes.pages import router as pages_router
-from app.routes.defacement import router as defacement_router
+from app.routes.defacement import router as defacement_router, get_detector, get_scheduler, get_watcher
 from app.config import settings
-from app.middleware import SecurityHeadersMiddleware
+from app.static_assets import FingerprintedStaticFiles, static_manifest
+from app.templating import page_cache, warm_templates
+from app.metrics import http_request_duration, http_requests_in_flight
+from app.dependencies import is_admin
+from app.middleware import (
+    MetricsMiddleware, ProfilingMiddleware, RateLimitMiddleware, SecurityHeadersMiddleware, create_backend
+)
 
 # Configure logging
 logging.basicConfig(
@@ -29,6 +35,35 @@ app = FastAPI(
     description="A production-ready government portal for defacement testing"
 )
 
+# Rate Limiting Middleware (added first so it runs innermost: 429s still get CORS and security headers)
+rate_limit_backend = create_backend(
+    settings.rate_limit_backend,
+    max_keys=settings.rate_limit_max_keys,
+    redis_url=settings.rate_limit_redis_url
+)
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        times=settings.rate_limit_times,
+        seconds=settings.rate_limit_seconds,
+        backend=rate_limit_backend,
+        costs=settings.rate_limit_costs,
+        trust_forwarded=settings.rate_limit_trust_forwarded,
+        trusted_hops=settings.rate_limit_trusted_hops,
+        exempt=settings.rate_limit_exempt
+    )
+
+# Profiling Middleware (inside CORS and security headers, so captures cover the handler and rate limiting)
+app.add_middleware(
+    ProfilingMiddleware,
+    store=profile_store,
+    authorize=is_admin,
+    sample_rate=settings.profiling_sample_rate,
+    paths=settings.profiling_paths,
+    interval=settings.profiling_interval,
+    max_duration=settings.profiling_max_duration
+)
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -39,13 +74,14 @@ app.add_middleware(
 )
 
 # Security Headers Middleware
-app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(SecurityHeadersMiddleware, request_id=settings.request_id_mode)
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Metrics Middleware (outermost, so latency includes the other middleware)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, duration=http_request_duration, in_flight=http_requests_in_flight)
 
-# Templates
-templates = Jinja2Templates(directory="app/templates")
+# Mount static files
+app.mount("/static", FingerprintedStaticFiles(static_manifest, directory="app/static"), name="static")
 
 # Exception Handlers
 @app.exception_handler(StarletteHTTPException)
@@ -78,15 +114,42 @@ async def startup_event():
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
     logger.info(f"Environment: {settings.environment}")
     logger.info(f"Debug mode: {settings.debug}")
+    logger.info(f"Fingerprinted {static_manifest.build()} static files")
+    # Cached pages may still link to the previous fingerprints
+    page_cache.bump()
+    if settings.template_warmup:
+        logger.info(f"Compiled {warm_templates()} templates")
+    # The database, search index and defacement services are otherwise built on first use
+    if settings.monitor_enabled:
+        get_scheduler.get().start()
+    if settings.watch_enabled:
+        get_watcher.get().start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down application")
+    # Services that were never used have nothing to stop
+    watcher = get_watcher.peek()
+    if watcher is not None:
+        watcher.stop()
+    scheduler = get_scheduler.peek()
+    if scheduler is not None:
+        await scheduler.stop()
+    detector = get_detector.peek()
+    if detector is not None:
+        await detector.aclose()
+    submission_store = get_submission_store.peek()
+    if submission_store is not None:
+        # Flush queued contact submissions before exiting
+        await submission_store.stop()
+    await rate_limit_backend.close()
 
 # Include Routers
 app.include_router(pages_router)
 app.include_router(defacement_router)
 app.include_router(basic_router)
+app.include_router(api_router)
+app.include_router(debug_router)
 
 # Root health check
 @app.get("/health")
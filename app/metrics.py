@@ -0,0 +1,36 @@
+"""
+Application metrics, served in Prometheus text format at /metrics
+"""
+from app.utils.metrics import MetricsRegistry
+
+# Finer buckets for per-check stages, which are often sub-millisecond
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+registry = MetricsRegistry()
+
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled"
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method, route template and status",
+    ("method", "route", "status")
+)
+defacement_stage_duration = registry.histogram(
+    "defacement_check_stage_duration_seconds",
+    "Time spent per defacement check in each stage "
+    "(fetch, fetch_assets, parse, normalize, hash, hash_images)",
+    ("stage",),
+    buckets=STAGE_BUCKETS
+)
+defacement_mismatches = registry.counter(
+    "defacement_mismatches_total",
+    "Baseline mismatches found by defacement checks, by entry type",
+    ("type",)
+)
+baseline_load_duration = registry.histogram(
+    "baseline_load_duration_seconds",
+    "Time to read and parse the active baseline from disk",
+    buckets=STAGE_BUCKETS
+)
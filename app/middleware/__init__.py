@@ -1,24 +1,76 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+import itertools
+import os
 import uuid
+from typing import Callable, Dict, List, Optional, Tuple
 
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to all responses"""
-    
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = "default-src 'self' 'unsafe-inline' 'unsafe-eval'; img-src 'self' data: https:;"
-        
-        # Request ID for tracking
-        request_id = str(uuid.uuid4())
-        response.headers["X-Request-ID"] = request_id
-        
-        return response
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.rate_limit import (
+    MemoryBackend,
+    RateLimitBackend,
+    RateLimitMiddleware,
+    RedisBackend,
+    create_backend,
+)
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "Content-Security-Policy": "default-src 'self' 'unsafe-inline' 'unsafe-eval'; img-src 'self' data: https:;",
+}
+
+
+def request_id_generator(mode: str = "counter") -> Callable[[], bytes]:
+    """Return a function producing request IDs as header bytes
+
+    "counter" gives a per-process random prefix plus a monotonic counter
+    (unique across workers, no syscall per request); "uuid4" keeps the
+    previous random UUIDs.
+    """
+    if mode == "uuid4":
+        return lambda: str(uuid.uuid4()).encode('latin-1')
+    if mode != "counter":
+        raise ValueError(f"Unknown request id mode: {mode}")
+
+    prefix = f"{os.getpid():x}-{os.urandom(4).hex()}-".encode('latin-1')
+    counter = itertools.count(1)
+    return lambda: prefix + b'%x' % next(counter)
+
+
+class SecurityHeadersMiddleware:
+    """Add security headers and a request ID to all responses
+
+    Plain ASGI: the header byte pairs are built once, and each response
+    only gets them appended to its start message.
+    """
+
+    def __init__(self, app: ASGIApp, request_id: str = "counter",
+                 headers: Optional[Dict[str, str]] = None):
+        self.app = app
+        self.headers: List[Tuple[bytes, bytes]] = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in (headers or SECURITY_HEADERS).items()
+        ]
+        self.header_names = frozenset(name for name, _ in self.headers) | {b'x-request-id'}
+        self.next_request_id = request_id_generator(request_id)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # Our values replace any the app set itself, as before
+                names = self.header_names
+                headers = [header for header in message.get("headers", ()) if header[0].lower() not in names]
+                headers.extend(self.headers)
+                headers.append((b'x-request-id', self.next_request_id()))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
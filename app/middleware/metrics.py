@@ -0,0 +1,49 @@
+"""
+Request metrics as a plain ASGI middleware
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import Gauge, Histogram
+
+
+class MetricsMiddleware:
+    """Record request latency per route template and the number of requests in flight
+
+    The route label is the matched path template (``/api/services/{service_id}``),
+    read from the scope after routing, so the number of series stays
+    bounded. Mounted apps only extend root_path, so they are labelled with
+    their mount prefix (``/static``); requests nothing matched are labelled
+    "unmatched".
+    """
+
+    def __init__(self, app: ASGIApp, duration: Histogram, in_flight: Gauge):
+        self.app = app
+        self.duration = duration
+        self.in_flight = in_flight
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        root_path = scope.get("root_path", "")
+        self.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight.dec()
+            route = scope.get("route")
+            template = getattr(route, "path", None) or scope.get("root_path", "")[len(root_path):] or "unmatched"
+            self.duration.labels(scope["method"], template, str(status)).observe(elapsed)
@@ -0,0 +1,81 @@
+"""
+Per-request sampling profiler as a plain ASGI middleware
+"""
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.profiler import Profile, ProfileStore, SamplingProfiler
+
+
+class ProfilingMiddleware:
+    """Profile requests that ask for it, or a sampled fraction of them
+
+    A request is profiled when it sends ``X-Profile: 1`` and ``authorize``
+    accepts its ``X-Admin-Token`` (None when absent), or at random with
+    probability ``sample_rate`` when its path starts with one of
+    ``paths``. Only one request is profiled at a time; the capture is kept
+    in ``store`` and its id returned in an ``X-Profile-Id`` header.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore, authorize: Callable[[Optional[str]], bool],
+                 sample_rate: float = 0.0, paths: Iterable[str] = (), interval: float = 0.005,
+                 max_duration: float = 30.0):
+        self.app = app
+        self.store = store
+        self.authorize = authorize
+        self.sample_rate = sample_rate
+        self.paths = tuple(paths)
+        self.interval = interval
+        self.max_duration = max_duration
+        self._active = threading.Lock()
+
+    def _requested(self, scope: Scope) -> bool:
+        wants, token = False, None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                wants = value not in (b"", b"0", b"false")
+            elif name == b"x-admin-token":
+                token = value.decode("latin-1")
+        if wants:
+            return self.authorize(token)
+        return bool(self.sample_rate) and scope["path"].startswith(self.paths) and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._requested(scope) or not self._active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.next_id()
+        status = None
+
+        async def send_with_id(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode("latin-1"))]
+            await send(message)
+
+        profiler = SamplingProfiler(interval=self.interval, max_duration=self.max_duration)
+        started_at = datetime.now()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            stacks = profiler.stop()
+            self.store.add(Profile(
+                id=profile_id,
+                method=scope["method"],
+                path=scope["path"],
+                status=status,
+                started_at=started_at,
+                duration=time.perf_counter() - started,
+                samples=profiler.samples,
+                stacks=stacks
+            ))
+            self._active.release()
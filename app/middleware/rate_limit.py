@@ -0,0 +1,221 @@
+"""
+Token-bucket rate limiting as a plain ASGI middleware
+
+Each client gets a bucket of ``times`` tokens that refills at
+``times / seconds`` tokens per second; a request spends its route's cost
+and is answered with 429 when the bucket runs dry. Work per request is a
+dict lookup plus a little arithmetic.
+
+Buckets live in a pluggable backend: MemoryBackend keeps them in-process
+with LRU eviction of idle clients; RedisBackend keeps them in Redis (or
+any server speaking its protocol) so the limit holds across workers.
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional dependency, only needed for RedisBackend
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend:
+    """Storage for token buckets"""
+
+    async def take(self, key: str, cost: float, capacity: float, rate: float) -> Tuple[bool, float]:
+        """Spend cost tokens from key's bucket; returns (allowed, seconds until it would be allowed)"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill time], least recently seen first
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def take(self, key: str, cost: float, capacity: float, rate: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [capacity, now]
+            if len(self._buckets) > self.max_keys:
+                # Evict the client that has been idle the longest
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return True, 0.0
+        return False, (cost - bucket[0]) / rate
+
+
+# Refill and spend atomically on the server, using the server's clock so
+# workers on different hosts agree on time
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, tostring(retry)}
+"""
+
+
+class RedisBackend(RateLimitBackend):
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "ratelimit:"):
+        if aioredis is None:
+            raise RuntimeError("RedisBackend needs the 'redis' package")
+        self.client = aioredis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, cost: float, capacity: float, rate: float) -> Tuple[bool, float]:
+        # Idle buckets expire once they would have refilled completely
+        ttl = max(1, int(capacity / rate) + 1)
+        allowed, retry = await self._script(keys=[self.prefix + key], args=[capacity, rate, cost, ttl])
+        return bool(int(allowed)), float(retry)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_backend(name: str, max_keys: int = 100_000, redis_url: Optional[str] = None) -> RateLimitBackend:
+    if name == "memory":
+        return MemoryBackend(max_keys=max_keys)
+    if name == "redis":
+        return RedisBackend(redis_url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+
+class RateLimitMiddleware:
+    """Limit each client to ``times`` cost units per ``seconds``
+
+    ``costs`` maps "METHOD /path" to a cost for exact routes; entries
+    ending in "*" match a path prefix. Unlisted requests cost 1 and a
+    cost of 0 exempts a route.
+
+    With ``trust_forwarded`` the client is read from X-Forwarded-For, taking
+    the entry ``trusted_hops`` from the right: each of that many proxies
+    appends the address it saw, and everything further left is whatever the
+    client sent. Direct peers in ``exempt`` (by default the loopback
+    addresses the background monitor crawls from) are never limited; a
+    forwarded address is never exempt, so a client can't claim one.
+    """
+
+    def __init__(self, app: ASGIApp, times: int = 100, seconds: int = 60,
+                 backend: Optional[RateLimitBackend] = None, costs: Optional[Dict[str, float]] = None,
+                 trust_forwarded: bool = False, trusted_hops: int = 1,
+                 exempt: Iterable[str] = ("127.0.0.1", "::1")):
+        self.app = app
+        self.capacity = float(times)
+        self.rate = times / seconds
+        self.backend = backend or MemoryBackend()
+        self.trust_forwarded = trust_forwarded
+        self.trusted_hops = max(1, trusted_hops)
+        self.exempt = frozenset(exempt)
+
+        self.exact_costs: Dict[Tuple[str, str], float] = {}
+        self.prefix_costs: List[Tuple[str, str, float]] = []
+        for route, cost in (costs or {}).items():
+            method, _, path = route.partition(' ')
+            # A request can never cost more than a full bucket
+            cost = min(float(cost), self.capacity)
+            if path.endswith('*'):
+                self.prefix_costs.append((method.upper(), path[:-1], cost))
+            else:
+                self.exact_costs[(method.upper(), path)] = cost
+
+    def cost_of(self, method: str, path: str) -> float:
+        cost = self.exact_costs.get((method, path))
+        if cost is not None:
+            return cost
+        for prefix_method, prefix, prefix_cost in self.prefix_costs:
+            if (prefix_method == '*' or prefix_method == method) and path.startswith(prefix):
+                return prefix_cost
+        return 1.0
+
+    def forwarded_for(self, scope: Scope) -> Optional[str]:
+        """Client address added by the trusted proxies, if the request came through them"""
+        hops: List[bytes] = []
+        for name, value in scope.get("headers", ()):
+            if name == b"x-forwarded-for":
+                hops.extend(hop.strip() for hop in value.split(b","))
+        if len(hops) < self.trusted_hops:
+            return None
+        return hops[-self.trusted_hops].decode("latin-1") or None
+
+    def client_key(self, scope: Scope) -> Tuple[str, bool]:
+        """Rate limit key for the request and whether it is an exempt direct peer"""
+        if self.trust_forwarded:
+            forwarded = self.forwarded_for(scope)
+            if forwarded is not None:
+                return forwarded, False
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        return peer, peer in self.exempt
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cost = self.cost_of(scope["method"], scope["path"])
+        if cost <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        key, exempt = self.client_key(scope)
+        if exempt:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            allowed, retry_after = await self.backend.take(key, cost, self.capacity, self.rate)
+        except Exception as e:
+            # A broken backend must not take the site down with it
+            logger.error(f"Rate limit backend failed, allowing request: {e}")
+            allowed, retry_after = True, 0.0
+
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"error": "Too many requests", "status_code": 429}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 from enum import Enum
 
@@ -117,11 +117,32 @@ class ContactSubmission(ContactForm):
 class DepartmentListResponse(BaseModel):
     total: int
     departments: List[Department]
+    next_cursor: Optional[str] = None
 
 
 class ServiceListResponse(BaseModel):
     total: int
     services: List[Service]
+    next_cursor: Optional[str] = None
+
+
+class SubmissionListResponse(BaseModel):
+    total: int
+    submissions: List[ContactSubmission]
+    next_cursor: Optional[str] = None
+
+
+class SearchResult(BaseModel):
+    type: str
+    score: float
+    item: Union[Service, Department]
+
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    total_exact: bool = True
+    results: List[SearchResult]
     
     
 class ContactResponse(BaseModel):
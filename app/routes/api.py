@@ -1,27 +1,104 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional, List, Set
+from itertools import islice
 from app.models import (
     Department, Service, ContactForm, ContactResponse,
-    DepartmentListResponse, ServiceListResponse, ContactSubmission
+    DepartmentListResponse, ServiceListResponse, SubmissionListResponse,
+    SearchResponse, SearchResult
 )
-from app.database import db
-from datetime import datetime
+from app.config import settings
+from app.database import MockDatabase, get_db
+from app.dependencies import require_admin
+from app.services.search_index import CatalogSearch
+from app.services.submission_store import SubmissionStore
+from app.utils.lazy import Provider
+from app.utils.pagination import NDJSON_MEDIA_TYPE, decode_cursor, encode_cursor, ndjson_stream, paginate, wants_ndjson
+from app.utils.response_cache import ResponseCache, normalize_params
 
 router = APIRouter(prefix="/api", tags=["API"])
 
+# Encoded catalog responses for the current db.version; bypasses response_model revalidation
+response_cache = ResponseCache(max_entries=settings.api_cache_max_entries, enabled=settings.api_cache_enabled)
+
+# Scans the log on construction, so it is built by the first request that needs it
+get_submission_store = Provider(lambda: SubmissionStore(
+    settings.submissions_file,
+    max_pending=settings.submissions_max_pending,
+    batch_size=settings.submissions_batch_size,
+    durable_ack=settings.submissions_durable_ack
+))
+
+# Built from db on the first search, then kept current through db's mutation listeners
+catalog_search = CatalogSearch(
+    min_prefix_length=settings.search_min_prefix_length,
+    max_expansions=settings.search_max_expansions,
+    min_typo_length=settings.search_min_typo_length,
+    max_total=settings.search_max_total
+)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _after_id(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _unpaginated(limit: Optional[int], cursor: Optional[str]) -> Optional[Set[str]]:
+    """Fields to leave out of a list response: next_cursor unless pagination was asked for"""
+    return {"next_cursor"} if limit is None and cursor is None else None
+
+
+def _ndjson_response(records, limit: Optional[int]) -> StreamingResponse:
+    if limit is not None:
+        records = islice(records, limit)
+    return StreamingResponse(ndjson_stream(records), media_type=NDJSON_MEDIA_TYPE)
+
 
 @router.get("/departments", response_model=DepartmentListResponse)
-async def get_departments():
-    """Get all departments"""
-    departments = db.get_all_departments()
-    return DepartmentListResponse(
-        total=len(departments),
-        departments=departments
-    )
+async def get_departments(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: MockDatabase = Depends(get_db)
+):
+    """Get all departments
+    
+    With limit or cursor the result is paginated in id order. Send
+    Accept: application/x-ndjson to stream one department per line instead.
+    """
+    after_id = _after_id(cursor)
+    if wants_ndjson(request.headers.get("accept")):
+        return _ndjson_response(db.iter_departments(after_id), limit)
+    
+    def build() -> DepartmentListResponse:
+        if limit is None and cursor is None:
+            departments = db.get_all_departments()
+            return DepartmentListResponse(
+                total=len(departments),
+                departments=departments
+            )
+        
+        departments, next_cursor = paginate(db.iter_departments(after_id), limit or DEFAULT_PAGE_SIZE)
+        return DepartmentListResponse(
+            total=db.count_departments(),
+            departments=departments,
+            next_cursor=next_cursor
+        )
+    
+    key = ("departments", normalize_params({"limit": limit, "cursor": cursor}))
+    return response_cache.response(db.version, key, build, exclude=_unpaginated(limit, cursor))
 
 
 @router.get("/departments/{dept_id}", response_model=Department)
-async def get_department(dept_id: int):
+async def get_department(dept_id: int, db: MockDatabase = Depends(get_db)):
     """Get a specific department by ID"""
     department = db.get_department_by_id(dept_id)
     if not department:
@@ -31,24 +108,46 @@ async def get_department(dept_id: int):
 
 @router.get("/services", response_model=ServiceListResponse)
 async def get_services(
+    request: Request,
     category: Optional[str] = Query(None, description="Filter by category"),
     department_id: Optional[int] = Query(None, description="Filter by department ID"),
-    online_only: Optional[bool] = Query(None, description="Show only online services")
+    online_only: Optional[bool] = Query(None, description="Show only online services"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    db: MockDatabase = Depends(get_db)
 ):
-    """Get all services with optional filtering"""
-    services = db.get_all_services(category=category, department_id=department_id)
+    """Get all services with optional filtering
     
-    if online_only is not None:
-        services = [s for s in services if s.is_online == online_only]
+    With limit or cursor the result is paginated in id order and total
+    counts every match. Send Accept: application/x-ndjson to stream one
+    service per line instead.
+    """
+    filters = {"category": category, "department_id": department_id, "is_online": online_only}
+    after_id = _after_id(cursor)
+    if wants_ndjson(request.headers.get("accept")):
+        return _ndjson_response(db.iter_services(**filters, after_id=after_id), limit)
     
-    return ServiceListResponse(
-        total=len(services),
-        services=services
-    )
+    def build() -> ServiceListResponse:
+        if limit is None and cursor is None:
+            services = db.get_all_services(**filters)
+            return ServiceListResponse(
+                total=len(services),
+                services=services
+            )
+        
+        services, next_cursor = paginate(db.iter_services(**filters, after_id=after_id), limit or DEFAULT_PAGE_SIZE)
+        return ServiceListResponse(
+            total=db.count_services(**filters),
+            services=services,
+            next_cursor=next_cursor
+        )
+    
+    key = ("services", normalize_params({**filters, "limit": limit, "cursor": cursor}))
+    return response_cache.response(db.version, key, build, exclude=_unpaginated(limit, cursor))
 
 
 @router.get("/services/{service_id}", response_model=Service)
-async def get_service(service_id: int):
+async def get_service(service_id: int, db: MockDatabase = Depends(get_db)):
     """Get a specific service by ID"""
     service = db.get_service_by_id(service_id)
     if not service:
@@ -56,20 +155,42 @@ async def get_service(service_id: int):
     return service
 
 
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms"),
+    kind: Optional[str] = Query(None, alias="type", pattern="^(department|service)$",
+                                description="Only departments or services"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    db: MockDatabase = Depends(get_db)
+):
+    """Search department and service names, descriptions and requirements
+    
+    Every word must match; the last one also matches as a prefix, and
+    longer words tolerate one typo. Results are ranked best first. Matches
+    are counted up to SEARCH_MAX_TOTAL; past that, total is a lower bound
+    and total_exact is false.
+    """
+    catalog_search.attach(db)
+    
+    def build() -> SearchResponse:
+        results, total, exact = catalog_search.search(q, limit=limit, kind=kind)
+        return SearchResponse(
+            query=q,
+            total=total,
+            total_exact=exact,
+            results=[SearchResult(type=kind, score=round(score, 4), item=row) for kind, score, row in results]
+        )
+    
+    key = ("search", normalize_params({"q": q, "type": kind, "limit": limit}))
+    return response_cache.response(db.version, key, build)
+
+
 @router.post("/contact", response_model=ContactResponse)
-async def submit_contact_form(form: ContactForm):
+async def submit_contact_form(form: ContactForm, submission_store: SubmissionStore = Depends(get_submission_store)):
     """Submit a contact form"""
     try:
-        # Create submission
-        submission = ContactSubmission(
-            id=0,  # Will be set by database
-            submitted_at=datetime.now(),
-            status="pending",
-            **form.dict()
-        )
-        
-        # Save to database
-        saved_submission = db.add_contact_submission(submission)
+        # The form is validated once, here; the store builds the record without revalidating
+        saved_submission = await submission_store.submit(form)
         
         return ContactResponse(
             success=True,
@@ -83,13 +204,36 @@ async def submit_contact_form(form: ContactForm):
         )
 
 
+@router.get("/contact/submissions", response_model=SubmissionListResponse, dependencies=[Depends(require_admin)])
+async def get_contact_submissions(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    submission_store: SubmissionStore = Depends(get_submission_store)
+):
+    """Read stored contact submissions from disk, oldest first"""
+    try:
+        offset = decode_cursor(cursor, kind="offset") if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    submissions, next_offset = await asyncio.to_thread(submission_store.read_page, offset, limit)
+    return SubmissionListResponse(
+        total=submission_store.count,
+        submissions=submissions,
+        next_cursor=encode_cursor(next_offset, kind="offset") if next_offset is not None else None
+    )
+
+
 @router.get("/stats")
-async def get_stats():
+async def get_stats(
+    db: MockDatabase = Depends(get_db),
+    submission_store: SubmissionStore = Depends(get_submission_store)
+):
     """Get portal statistics"""
-    return {
-        "total_departments": len(db.get_all_departments()),
-        "total_services": len(db.get_all_services()),
-        "online_services": len([s for s in db.get_all_services() if s.is_online]),
-        "total_submissions": len(db.contact_submissions),
-        "last_updated": datetime.now().isoformat()
-    }
+    # Submissions live outside the database, so their count goes in the key; putting it in the
+    # version would drop every cached catalog response whenever stats and catalog calls alternate
+    return response_cache.response(db.version, ("stats", submission_store.count), lambda: {
+        **db.get_stats(),
+        "total_submissions": submission_store.count,
+        "last_updated": db.updated_at.isoformat()
+    })
@@ -1,5 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
 from datetime import datetime
+from app.config import settings
+from app.metrics import registry
+from app.utils.metrics import CONTENT_TYPE
 
 router = APIRouter()
 
@@ -10,3 +14,10 @@ def health_check():
 @router.get("/time")
 def current_time():
     return {"server_time": datetime.now()}
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Dict, List
+from app.config import settings
+from app.dependencies import require_admin
+from app.utils.profiler import ProfileStore, collapsed_text
+
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_admin)])
+
+# Recent captures from ProfilingMiddleware
+profile_store = ProfileStore(max_profiles=settings.profiling_max_profiles)
+
+
+@router.get("/profiles")
+async def list_profiles() -> List[Dict]:
+    """Recent request profiles, newest first"""
+    return [profile.summary() for profile in profile_store.list()]
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def download_profile(profile_id: str):
+    """One profile in collapsed-stack format, e.g. for flamegraph.pl or speedscope"""
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        collapsed_text(profile.stacks),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+    )
@@ -1,21 +1,75 @@
 """
 Defacement Detection API Routes
 """
-from fastapi import APIRouter, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional
 
 from app.services.baseline_manager import BaselineManager
 from app.services.defacement_detector import DefacementDetector
+from app.services.monitor_scheduler import MonitorScheduler
+from app.services.file_watcher import FileWatcher
+from app.static_assets import static_manifest
+from app.templating import page_cache
+from app.utils.hash_utils import FileHashCache
+from app.utils.lazy import Provider
+from app.config import settings
 
 router = APIRouter(prefix="/api/defacement", tags=["defacement"])
 
-baseline_manager = BaselineManager()
-detector = DefacementDetector()
+
+def _hash_cache() -> Optional[FileHashCache]:
+    if not settings.hash_cache_enabled:
+        return None
+    return FileHashCache(
+        "data/hash_cache.json",
+        paranoid=settings.hash_cache_paranoid,
+        verify_rate=settings.hash_cache_verify_rate
+    )
+
+
+# Services are built on first use (they create data/ and load caches), not at import
+get_hash_cache = Provider(_hash_cache)
+get_baseline_manager = Provider(lambda: BaselineManager(
+    hash_cache=get_hash_cache.get(),
+    asset_chunking=settings.asset_chunking_enabled,
+    chunking_max_file_size=settings.asset_chunking_max_file_size,
+    history_size=settings.baseline_history_size,
+    static_manifest=static_manifest
+))
+get_detector = Provider(lambda: DefacementDetector(
+    max_workers=settings.detector_max_workers,
+    fetch_timeout=settings.detector_fetch_timeout,
+    max_connections=settings.detector_max_connections,
+    hash_cache=get_hash_cache.get(),
+    chunk_stop_at_first=settings.asset_chunking_stop_at_first,
+    conditional_get=settings.detector_conditional_get,
+    conditional_max_age=settings.detector_conditional_max_age,
+    crawl_concurrency=settings.crawl_concurrency,
+    crawl_per_host_limit=settings.crawl_per_host_limit,
+    shard_threshold=settings.verify_shard_threshold,
+    process_workers=settings.verify_process_workers
+))
+get_scheduler = Provider(lambda: MonitorScheduler(
+    get_detector.get(),
+    baseline_loader=get_baseline_manager.get().load_baseline,
+    targets=settings.monitor_targets,
+    max_concurrency=settings.monitor_max_concurrency
+))
+get_watcher = Provider(lambda: FileWatcher(
+    get_scheduler.get(),
+    url=settings.monitor_targets[0].url if settings.monitor_targets else "http://localhost:9000",
+    debounce_seconds=settings.watch_debounce_seconds,
+    page_cache=page_cache
+))
 
 
 class BaselineCreateRequest(BaseModel):
     url: str = "http://localhost:9000"
+    crawl: bool = False
+    max_pages: Optional[int] = None
 
 
 class DefacementCheckRequest(BaseModel):
@@ -23,25 +77,43 @@ class DefacementCheckRequest(BaseModel):
 
 
 @router.post("/baseline/create")
-async def create_baseline(request: BaselineCreateRequest):
+async def create_baseline(request: BaselineCreateRequest, baseline_manager: BaselineManager = Depends(get_baseline_manager)):
     """Create a new baseline snapshot"""
     try:
-        baseline = baseline_manager.create_baseline(request.url)
+        if request.crawl:
+            baseline = await baseline_manager.create_crawl_baseline(
+                request.url,
+                max_pages=request.max_pages or settings.crawl_max_pages,
+                concurrency=settings.crawl_concurrency,
+                per_host_limit=settings.crawl_per_host_limit
+            )
+        else:
+            # Hashing and chunking assets is blocking work
+            baseline = await asyncio.to_thread(baseline_manager.create_baseline, request.url)
+        summary = {
+            "version": baseline['version'],
+            "created_at": baseline['created_at'],
+            "zones_count": len(baseline['zones']),
+            "images_count": len(baseline['images'])
+        }
+        if request.crawl:
+            summary.update({
+                "pages_count": len(baseline['pages']),
+                "assets_count": len(baseline['assets']),
+                "errors_count": len(baseline['crawl_errors']),
+                "timings": baseline['timings']
+            })
         return {
             "success": True,
             "message": "Baseline created successfully",
-            "baseline": {
-                "created_at": baseline['created_at'],
-                "zones_count": len(baseline['zones']),
-                "images_count": len(baseline['images'])
-            }
+            "baseline": summary
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create baseline: {str(e)}")
 
 
 @router.get("/baseline/status")
-async def get_baseline_status():
+async def get_baseline_status(baseline_manager: BaselineManager = Depends(get_baseline_manager)):
     """Check if baseline exists"""
     exists = baseline_manager.baseline_exists()
     baseline = None
@@ -52,6 +124,7 @@ async def get_baseline_status():
     return {
         "exists": exists,
         "baseline": {
+            "version": baseline.get('version') if baseline else None,
             "created_at": baseline['created_at'] if baseline else None,
             "zones_count": len(baseline['zones']) if baseline else 0,
             "images_count": len(baseline['images']) if baseline else 0
@@ -59,35 +132,90 @@ async def get_baseline_status():
     }
 
 
+@router.get("/baseline")
+async def list_baseline_versions(baseline_manager: BaselineManager = Depends(get_baseline_manager)):
+    """List stored baseline versions, newest first"""
+    versions = baseline_manager.list_versions()
+    active = next((v['version'] for v in versions if v['active']), None)
+    
+    return {"active": active, "versions": versions}
+
+
+@router.post("/baseline/{version}/activate")
+async def activate_baseline_version(
+    version: str,
+    baseline_manager: BaselineManager = Depends(get_baseline_manager),
+    scheduler: MonitorScheduler = Depends(get_scheduler)
+):
+    """Make a stored baseline version the active baseline"""
+    try:
+        baseline = baseline_manager.activate_version(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Baseline version {version} not found")
+    scheduler.clear_reports()
+    
+    return {
+        "success": True,
+        "message": f"Baseline version {version} activated",
+        "baseline": {
+            "version": baseline['version'],
+            "created_at": baseline['created_at'],
+            "zones_count": len(baseline['zones']),
+            "images_count": len(baseline['images'])
+        }
+    }
+
+
 @router.post("/check")
-async def check_defacement(request: DefacementCheckRequest):
+async def check_defacement(
+    request: DefacementCheckRequest,
+    baseline_manager: BaselineManager = Depends(get_baseline_manager),
+    detector: DefacementDetector = Depends(get_detector),
+    scheduler: MonitorScheduler = Depends(get_scheduler)
+):
     """Check for defacement against baseline"""
     if not baseline_manager.baseline_exists():
         raise HTTPException(status_code=404, detail="No baseline found. Create a baseline first.")
     
     baseline = baseline_manager.load_baseline()
-    report = detector.check_defacement(baseline, request.url)
+    report = await detector.check_defacement_async(baseline, request.url)
+    await scheduler.record_report(request.url, report)
     
     return report
 
 
 @router.get("/report")
-async def get_latest_report():
-    """Get the latest defacement report"""
-    # For now, just check immediately
-    if not baseline_manager.baseline_exists():
-        raise HTTPException(status_code=404, detail="No baseline found. Create a baseline first.")
+async def get_latest_report(
+    url: Optional[str] = Query(None, description="Monitored target URL"),
+    scheduler: MonitorScheduler = Depends(get_scheduler)
+):
+    """Get the latest defacement report stored by the monitor scheduler
     
-    baseline = baseline_manager.load_baseline()
-    report = detector.check_defacement(baseline, "http://localhost:9000")
+    Only monitor targets have reports. Before the first check of a target
+    has run, the target is checked now, as this endpoint always did.
+    """
+    if url is None:
+        url = settings.monitor_targets[0].url if settings.monitor_targets else "http://localhost:9000"
+    if not scheduler.is_target(url):
+        raise HTTPException(status_code=404, detail="Not a monitored target.")
+    
+    report = scheduler.get_latest_report(url)
+    if report is None:
+        report = await scheduler.run_check(url)
+    if report is None:
+        raise HTTPException(status_code=404, detail="No baseline found. Create a baseline first.")
     
     return report
 
 
 @router.delete("/baseline/reset")
-async def reset_baseline():
+async def reset_baseline(
+    baseline_manager: BaselineManager = Depends(get_baseline_manager),
+    scheduler: MonitorScheduler = Depends(get_scheduler)
+):
     """Delete the current baseline"""
     deleted = baseline_manager.delete_baseline()
+    scheduler.clear_reports()
     
     if deleted:
         return {"success": True, "message": "Baseline deleted successfully"}
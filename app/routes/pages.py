@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+
+from app.templating import cached_page_response
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Simple home page - static content only"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return cached_page_response(request, ("home",), "index.html")
@@ -1,43 +1,65 @@
 """
 Baseline Manager - Creates and manages defacement detection baselines
 """
-import json
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional
-from bs4 import BeautifulSoup
-from jinja2 import Environment, FileSystemLoader
-import requests
+from typing import Dict, List, Optional
 
-from app.utils.hash_utils import calculate_string_hash, calculate_file_hash, normalize_html
+from app.services.baseline_store import BaselineStore
+from app.services.site_crawler import SiteCrawler
+from app.utils.chunking import DEFAULT_CHUNKING, chunk_file
+from app.utils.hash_utils import FileHashCache, calculate_file_hash
+from app.utils.static_manifest import StaticManifest
+from app.templating import render_templates
+from app.utils.zone_extractor import ZONE_HASH_VERSION, extract_zones
 
 
 class BaselineManager:
-    def __init__(self, data_dir: str = "data"):
+    # Protected zone ids and the templates that render them
+    ZONES = ['header', 'sidebar', 'footer']
+    ZONE_TEMPLATES = {
+        'base.html': ['header', 'sidebar', 'footer'],
+    }
+    
+    def __init__(self, data_dir: str = "data", hash_cache: Optional[FileHashCache] = None,
+                 asset_chunking: bool = False, history_size: int = 10,
+                 static_manifest: Optional[StaticManifest] = None,
+                 chunking_max_file_size: int = 8 * 1024 * 1024):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
-        self.baseline_file = self.data_dir / "baseline.json"
-        
-        # Setup Jinja2 for template rendering (localhost only)
-        self.jinja_env = Environment(loader=FileSystemLoader('app/templates'))
+        self.store = BaselineStore(data_dir, history_size=history_size)
+        self.baseline_file = self.store.baseline_file
+        self.hash_cache = hash_cache
+        self.asset_chunking = asset_chunking
+        # Chunking runs at a few MB/s, so larger assets only get the whole-file hash
+        self.chunking_max_file_size = chunking_max_file_size
+        self.static_manifest = static_manifest
     
     def is_production(self) -> bool:
         """Check if running on Vercel/production"""
         return os.getenv('VERCEL') == '1' or os.getenv('PRODUCTION') == 'true'
     
+    def render_pages(self, template_names: List[str]) -> Dict[str, str]:
+        """Render local pages in one batch with the shared template environment"""
+        return render_templates(template_names, {'request': {'url': '/'}})
+    
     def create_baseline(self, url: str, static_dir: str = "app/static") -> Dict:
         """Create a baseline snapshot of the website"""
         baseline = {
             "created_at": datetime.now().isoformat(),
             "url": url,
+            "zone_hash_version": ZONE_HASH_VERSION,
             "zones": {},
             "images": {}
         }
+        if self.asset_chunking:
+            baseline['asset_chunking'] = dict(DEFAULT_CHUNKING)
         
         # Get HTML content based on environment
         if self.is_production():
             # Production: Use HTTP request to fetch actual page
+            import requests
             try:
                 response = requests.get(url, timeout=10)
                 response.raise_for_status()
@@ -47,24 +69,18 @@ class BaselineManager:
         else:
             # Localhost: Render template directly (faster, no HTTP overhead)
             try:
-                template = self.jinja_env.get_template('index.html')
-                html_content = template.render(request={'url': '/'})
+                html_content = self.render_pages(['index.html'])['index.html']
             except Exception as e:
                 raise Exception(f"Failed to render template: {e}")
         
-        # Parse HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Extract protected zones
-        zones = ['header', 'sidebar', 'footer']
-        for zone_id in zones:
-            zone_element = soup.find(id=zone_id)
-            if zone_element:
-                zone_html = str(zone_element)
-                normalized = normalize_html(zone_html)
+        # Extract protected zones and their element trees in a single streaming pass
+        zones = extract_zones(html_content, self.ZONES, build_tree=True)
+        for zone_id in self.ZONES:
+            if zone_id in zones:
                 baseline['zones'][zone_id] = {
-                    'hash': calculate_string_hash(normalized),
-                    'content_preview': zone_element.get_text()[:100].strip()
+                    'hash': zones[zone_id].hash,
+                    'content_preview': zones[zone_id].preview,
+                    'tree': zones[zone_id].tree
                 }
         
         # Hash protected images
@@ -79,33 +95,77 @@ class BaselineManager:
         for img_id, img_path in images.items():
             full_path = static_path / img_path
             if full_path.exists():
+                # Reuse the startup manifest digest while the file is unchanged since then;
+                # otherwise re-read it, refreshing the cache on the way
+                file_hash = None
+                if self.static_manifest is not None and static_path == self.static_manifest.static_dir:
+                    file_hash = self.static_manifest.digest_for(full_path)
+                if file_hash is None and self.hash_cache is not None:
+                    file_hash = self.hash_cache.get_hash(full_path, refresh=True)
+                elif file_hash is None:
+                    file_hash = calculate_file_hash(full_path)
+                size = full_path.stat().st_size
                 baseline['images'][img_id] = {
                     'path': f'/static/{img_path}',
-                    'hash': calculate_file_hash(full_path),
-                    'size': full_path.stat().st_size
+                    'hash': file_hash,
+                    'size': size
                 }
+                if self.asset_chunking and size <= self.chunking_max_file_size:
+                    baseline['images'][img_id]['chunks'] = [
+                        list(chunk) for chunk in chunk_file(full_path, **baseline['asset_chunking'])
+                    ]
+        
+        if self.hash_cache is not None:
+            self.hash_cache.save()
         
-        # Save baseline
-        with open(self.baseline_file, 'w') as f:
-            json.dump(baseline, f, indent=2)
+        # Save baseline as a new active version
+        self.store.save(baseline)
         
         return baseline
     
-    def load_baseline(self) -> Optional[Dict]:
-        """Load existing baseline"""
-        if not self.baseline_file.exists():
-            return None
+    async def create_crawl_baseline(self, url: str, max_pages: int = 500, concurrency: int = 16,
+                                    per_host_limit: int = 8) -> Dict:
+        """Create a baseline for every same-origin page and asset reachable from url"""
+        crawler = SiteCrawler(self.ZONES, max_pages=max_pages, concurrency=concurrency,
+                              per_host_limit=per_host_limit)
+        result = await crawler.crawl(url)
+        if url not in result['pages']:
+            raise Exception(f"Failed to fetch URL: {result['errors'].get(url, 'not an HTML page')}")
         
-        with open(self.baseline_file, 'r') as f:
-            return json.load(f)
+        baseline = {
+            "created_at": datetime.now().isoformat(),
+            "url": url,
+            "mode": "crawl",
+            "zone_hash_version": ZONE_HASH_VERSION,
+            # Root page zones keep the single-page fields meaningful
+            "zones": result['pages'][url]['zones'],
+            "images": {},
+            "pages": result['pages'],
+            "assets": result['assets'],
+            "crawl_errors": result['errors'],
+            "timings": result['timings']
+        }
+        
+        self.store.save(baseline)
+        
+        return baseline
+    
+    def load_baseline(self) -> Optional[Dict]:
+        """Load existing baseline (cached in memory until the file changes)"""
+        return self.store.load()
     
     def baseline_exists(self) -> bool:
         """Check if baseline exists"""
-        return self.baseline_file.exists()
+        return self.store.exists()
     
     def delete_baseline(self) -> bool:
         """Delete existing baseline"""
-        if self.baseline_file.exists():
-            self.baseline_file.unlink()
-            return True
-        return False
+        return self.store.delete()
+    
+    def list_versions(self) -> List[Dict]:
+        """List stored baseline versions, newest first"""
+        return self.store.list_versions()
+    
+    def activate_version(self, version: str) -> Dict:
+        """Make a stored baseline version the active one"""
+        return self.store.activate(version)
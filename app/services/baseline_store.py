@@ -0,0 +1,130 @@
+"""
+Baseline Store - Versioned baseline storage with an in-memory copy of the active baseline
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.metrics import baseline_load_duration
+from app.utils.file_utils import atomic_write_json
+
+VERSION_PATTERN = re.compile(r'^\d{8}T\d{12}$')
+
+
+class BaselineStore:
+    def __init__(self, data_dir: str = "data", history_size: int = 10):
+        self.data_dir = Path(data_dir)
+        self.baseline_file = self.data_dir / "baseline.json"
+        self.history_dir = self.data_dir / "baselines"
+        # The version just written is always kept, whatever the setting
+        self.history_size = max(1, history_size)
+
+        self._lock = threading.Lock()
+        self._cached: Optional[Dict] = None
+        self._cached_key: Optional[Tuple[int, int, int]] = None
+
+    def _file_key(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = self.baseline_file.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def exists(self) -> bool:
+        return self.baseline_file.exists()
+
+    def load(self) -> Optional[Dict]:
+        """Return the active baseline, re-reading the file only when it was replaced
+
+        The returned dict is shared between callers and must not be modified.
+        """
+        key = self._file_key()
+        if key is None:
+            with self._lock:
+                self._cached, self._cached_key = None, None
+            return None
+
+        with self._lock:
+            if key == self._cached_key:
+                return self._cached
+
+        started = time.perf_counter()
+        with open(self.baseline_file, 'r') as f:
+            baseline = json.load(f)
+        baseline_load_duration.observe(time.perf_counter() - started)
+
+        with self._lock:
+            self._cached, self._cached_key = baseline, key
+        return baseline
+
+    def _remember(self, baseline: Dict):
+        with self._lock:
+            self._cached, self._cached_key = baseline, self._file_key()
+
+    def save(self, baseline: Dict) -> str:
+        """Store a new baseline version and make it the active one"""
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        version = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        baseline['version'] = version
+
+        atomic_write_json(self.history_dir / f"{version}.json", baseline)
+        atomic_write_json(self.baseline_file, baseline)
+        self._remember(baseline)
+        self._prune()
+        return version
+
+    def _prune(self):
+        versions = sorted(self.history_dir.glob("*.json"))
+        for path in versions[:-self.history_size]:
+            path.unlink(missing_ok=True)
+
+    def _version_file(self, version: str) -> Path:
+        if not VERSION_PATTERN.match(version):
+            raise KeyError(version)
+        path = self.history_dir / f"{version}.json"
+        if not path.exists():
+            raise KeyError(version)
+        return path
+
+    def list_versions(self) -> List[Dict]:
+        """Describe the stored baseline versions, newest first"""
+        active = self.load()
+        active_version = active.get('version') if active else None
+
+        versions = []
+        for path in sorted(self.history_dir.glob("*.json"), reverse=True):
+            try:
+                with open(path, 'r') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError):
+                continue
+            versions.append({
+                "version": path.stem,
+                "created_at": baseline.get('created_at'),
+                "url": baseline.get('url'),
+                "zones_count": len(baseline.get('zones', {})),
+                "images_count": len(baseline.get('images', {})),
+                "active": path.stem == active_version
+            })
+        return versions
+
+    def activate(self, version: str) -> Dict:
+        """Make a stored version the active baseline; raises KeyError if it doesn't exist"""
+        with open(self._version_file(version), 'r') as f:
+            baseline = json.load(f)
+        atomic_write_json(self.baseline_file, baseline)
+        self._remember(baseline)
+        return baseline
+
+    def delete(self) -> bool:
+        """Remove the active baseline, keeping the stored versions"""
+        with self._lock:
+            self._cached, self._cached_key = None, None
+        if self.baseline_file.exists():
+            self.baseline_file.unlink()
+            return True
+        return False
@@ -1,84 +1,271 @@
 """
 Defacement Detector - Detects changes from baseline
 """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
-from bs4 import BeautifulSoup
-import requests
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 
-from app.utils.hash_utils import calculate_string_hash, calculate_file_hash, normalize_html
+from app.metrics import defacement_mismatches, defacement_stage_duration
+from app.services.sharded_verifier import ShardedVerifier
+from app.services.site_crawler import SiteCrawler
+from app.utils.chunking import diff_chunks
+from app.utils.hash_utils import FileHashCache, calculate_string_hash, calculate_file_hash, normalize_html
+from app.utils.zone_extractor import ZONE_HASH_VERSION, ZoneResult, diff_zone_trees, extract_zones, zone_hash_version
+
+# httpx, requests and bs4 are imported on first use, which keeps them out of cold starts
+if TYPE_CHECKING:
+    import httpx
+
+# Crawl and shard timings under the single-page stage names
+SITE_STAGES = {'fetch': 'fetch', 'fetch_assets': 'fetch_assets', 'hash_zones': 'parse'}
+
+
+def record_stage(stage: str, seconds: float):
+    defacement_stage_duration.labels(stage).observe(seconds)
+
+
+def record_mismatches(changes: List[Dict]):
+    for change in changes:
+        defacement_mismatches.labels(change['type']).inc()
 
 
 class DefacementDetector:
-    def __init__(self):
-        pass
-    
-    def check_defacement(self, baseline: Dict, url: str, static_dir: str = "app/static") -> Dict:
-        """Check for defacement by comparing current state with baseline"""
-        report = {
+    def __init__(self, max_workers: int = 4, fetch_timeout: float = 5.0,
+                 max_connections: int = 20, max_keepalive_connections: int = 10,
+                 hash_cache: Optional[FileHashCache] = None, chunk_stop_at_first: bool = False,
+                 conditional_get: bool = True, conditional_max_age: float = 300.0,
+                 crawl_concurrency: int = 16, crawl_per_host_limit: int = 8,
+                 shard_threshold: int = 2000, process_workers: int = 4):
+        self.fetch_timeout = fetch_timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.hash_cache = hash_cache
+        self.chunk_stop_at_first = chunk_stop_at_first
+        self.conditional_get = conditional_get
+        self.conditional_max_age = conditional_max_age
+        self.crawl_concurrency = crawl_concurrency
+        self.crawl_per_host_limit = crawl_per_host_limit
+        self.shard_threshold = shard_threshold
+
+        # Per-URL ETag/Last-Modified plus the zone hashes verified with them
+        self._validators: Dict[str, Dict] = {}
+
+        # Parsing and hashing are CPU-bound, so the async path runs them here
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="defacement")
+        self._client: Optional["httpx.AsyncClient"] = None
+        # Crawl baselines with at least shard_threshold URLs are checked across processes
+        self._sharded_verifier = ShardedVerifier(workers=process_workers, fetch_timeout=fetch_timeout)
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        """Return the shared keep-alive client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=self.fetch_timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP client, the analysis executor and the verification processes"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._executor.shutdown(wait=False)
+        self._sharded_verifier.shutdown()
+
+    def _error_report(self, error: Exception) -> Dict:
+        return {
             "timestamp": datetime.now().isoformat(),
             "defacement_detected": False,
+            "error": f"Failed to fetch URL: {error}",
             "changes": [],
-            "summary": "No changes detected"
+            "summary": "Error fetching page"
         }
-        
+
+    def _conditional_headers(self, url: str, baseline: Dict, zone_ids: Optional[List[str]]) -> Dict[str, str]:
+        """Validators to send when the last verified zone hashes for url can be reused"""
+        entry = self._validators.get(url)
+        if entry is None or not self.conditional_get:
+            return {}
+        if time.monotonic() - entry['verified_at'] > self.conditional_max_age:
+            # Too old: force a full download and verification
+            return {}
+        wanted = set(baseline.get('zones', {})) if zone_ids is None else set(zone_ids)
+        if entry['baseline_key'] != self._baseline_key(baseline) or not wanted <= entry['zone_ids']:
+            return {}
+
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def _baseline_key(baseline: Dict):
+        return (zone_hash_version(baseline), baseline.get('version'), baseline.get('created_at'))
+
+    def _analyze_response(self, baseline: Dict, url: str, status_code: int, html_content: Optional[str],
+                          response_headers, static_dir: str, zone_ids: Optional[List[str]] = None,
+                          image_ids: Optional[List[str]] = None) -> Dict:
+        """Analyze a fetch result, reusing the last verified zone hashes on 304"""
+        if status_code == 304:
+            entry = self._validators.get(url)
+            if entry is None:
+                return self._error_report(Exception("Not Modified received without a verified copy"))
+            report = self.analyze(baseline, None, static_dir, zone_ids, image_ids, current_zones=entry['zones'])
+            report['not_modified'] = True
+            return report
+
+        zones = self._select(baseline.get('zones', {}), zone_ids)
+        current_zones = self.hash_zones(baseline, zones, html_content)
+
+        etag = response_headers.get('etag')
+        last_modified = response_headers.get('last-modified')
+        if self.conditional_get and (etag or last_modified):
+            self._validators[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'baseline_key': self._baseline_key(baseline),
+                'zone_ids': set(zones),
+                'zones': current_zones,
+                'verified_at': time.monotonic()
+            }
+        else:
+            self._validators.pop(url, None)
+
+        return self.analyze(baseline, html_content, static_dir, zone_ids, image_ids, current_zones=current_zones)
+
+    def check_defacement(self, baseline: Dict, url: str, static_dir: str = "app/static") -> Dict:
+        """Check for defacement by comparing current state with baseline"""
+        import requests
+
         # Fetch current HTML
+        started = time.perf_counter()
         try:
-            response = requests.get(url, timeout=5)
+            response = requests.get(url, timeout=self.fetch_timeout,
+                                    headers=self._conditional_headers(url, baseline, None))
             response.raise_for_status()
-            html_content = response.text
         except Exception as e:
-            return {
-                "timestamp": datetime.now().isoformat(),
-                "defacement_detected": False,
-                "error": f"Failed to fetch URL: {e}",
-                "changes": [],
-                "summary": "Error fetching page"
-            }
-        
-        # Parse HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
+            return self._error_report(e)
+        finally:
+            record_stage('fetch', time.perf_counter() - started)
+
+        html_content = response.text if response.status_code != 304 else None
+        return self._analyze_response(baseline, url, response.status_code, html_content,
+                                      response.headers, static_dir)
+
+    async def check_defacement_async(self, baseline: Dict, url: str, static_dir: str = "app/static",
+                                     conditional: bool = True) -> Dict:
+        """Non-blocking variant of check_defacement for use inside the event loop"""
+        if baseline.get('pages'):
+            return await self.check_site_async(baseline)
+        return await self.check_entries_async(baseline, url, None, None, static_dir, conditional=conditional)
+
+    async def check_entries_async(self, baseline: Dict, url: str, zone_ids: Optional[List[str]],
+                                  image_ids: Optional[List[str]], static_dir: str = "app/static",
+                                  conditional: bool = True) -> Dict:
+        """Re-check only the given zones and images (all of them for None)
+
+        The page is fetched only if zones are involved. With conditional
+        False the stored validators for url are dropped and the page is
+        downloaded and hashed in full; use this when something is known to
+        have changed, since a stale ETag anywhere in front of the page would
+        otherwise turn a real change into "not modified".
+        """
+        loop = asyncio.get_running_loop()
+        if not conditional:
+            self._validators.pop(url, None)
+        if zone_ids is not None and not zone_ids:
+            return await loop.run_in_executor(
+                self._executor, self.analyze, baseline, None, static_dir, zone_ids, image_ids
+            )
+
+        started = time.perf_counter()
+        try:
+            response = await self._get_client().get(
+                url, headers=self._conditional_headers(url, baseline, zone_ids)
+            )
+            if response.status_code != 304:
+                response.raise_for_status()
+        except Exception as e:
+            return self._error_report(e)
+        finally:
+            record_stage('fetch', time.perf_counter() - started)
+
+        html_content = response.text if response.status_code != 304 else None
+        return await loop.run_in_executor(
+            self._executor, self._analyze_response, baseline, url, response.status_code,
+            html_content, response.headers, static_dir, zone_ids, image_ids
+        )
+
+    @staticmethod
+    def _select(entries: Dict, ids: Optional[List[str]]) -> Dict:
+        if ids is None:
+            return entries
+        return {entry_id: entries[entry_id] for entry_id in ids if entry_id in entries}
+
+    def hash_zones(self, baseline: Dict, zones: Dict, html_content: str) -> Dict[str, ZoneResult]:
+        """Hash the current zones the same way the baseline was hashed"""
+        if not zones:
+            return {}
+        if zone_hash_version(baseline) >= ZONE_HASH_VERSION:
+            # Parsing, normalizing and hashing happen in one streaming pass
+            build_tree = any('tree' in zone_data for zone_data in zones.values())
+            started = time.perf_counter()
+            results = extract_zones(html_content, zones, build_tree=build_tree)
+            record_stage('parse', time.perf_counter() - started)
+            return results
+        return self._legacy_zone_hashes(html_content, zones)
+
+    def analyze(self, baseline: Dict, html_content: Optional[str], static_dir: str = "app/static",
+                zone_ids: Optional[List[str]] = None, image_ids: Optional[List[str]] = None,
+                current_zones: Optional[Dict[str, ZoneResult]] = None) -> Dict:
+        """Compare already fetched HTML and the static files on disk with baseline
+
+        When zone_ids or image_ids are given, only those baseline entries are
+        checked. Zone hashes already computed for this HTML can be passed as
+        current_zones to skip parsing.
+        """
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "defacement_detected": False,
+            "changes": [],
+            "summary": "No changes detected"
+        }
+
+        zones = self._select(baseline.get('zones', {}), zone_ids)
+        images = self._select(baseline.get('images', {}), image_ids)
+        if current_zones is None:
+            current_zones = self.hash_zones(baseline, zones, html_content)
+
         # Check zones
-        for zone_id, zone_data in baseline.get('zones', {}).items():
-            zone_element = soup.find(id=zone_id)
-            if zone_element:
-                zone_html = str(zone_element)
-                normalized = normalize_html(zone_html)
-                current_hash = calculate_string_hash(normalized)
-                
-                if current_hash != zone_data['hash']:
-                    report['changes'].append({
-                        'type': 'zone',
-                        'zone': zone_id,
-                        'expected_hash': zone_data['hash'],
-                        'current_hash': current_hash,
-                        'description': f'Zone "{zone_id}" content has been modified',
-                        'current_preview': zone_element.get_text()[:100].strip()
-                    })
-                    report['defacement_detected'] = True
-            else:
-                report['changes'].append({
-                    'type': 'zone',
-                    'zone': zone_id,
-                    'description': f'Zone "{zone_id}" is missing from page',
-                    'severity': 'critical'
-                })
-                report['defacement_detected'] = True
-        
+        report['changes'].extend(self.compare_zones(zones, current_zones))
+        report['defacement_detected'] = bool(report['changes'])
+
         # Check images
         static_path = Path(static_dir)
-        for img_id, img_data in baseline.get('images', {}).items():
+        hash_seconds = 0.0
+        for img_id, img_data in images.items():
             img_path = img_data['path'].replace('/static/', '')
             full_path = static_path / img_path
-            
+
             if full_path.exists():
-                current_hash = calculate_file_hash(full_path)
+                started = time.perf_counter()
+                current_hash = calculate_file_hash(full_path, cache=self.hash_cache)
+                hash_seconds += time.perf_counter() - started
                 current_size = full_path.stat().st_size
-                
+
                 if current_hash != img_data['hash']:
-                    report['changes'].append({
+                    change = {
                         'type': 'image',
                         'image': img_id,
                         'path': img_data['path'],
@@ -87,7 +274,13 @@ class DefacementDetector:
                         'expected_size': img_data['size'],
                         'current_size': current_size,
                         'description': f'Image "{img_id}" has been replaced or modified'
-                    })
+                    }
+                    if img_data.get('chunks') and baseline.get('asset_chunking'):
+                        change.update(diff_chunks(
+                            img_data['chunks'], full_path, baseline['asset_chunking'],
+                            stop_at_first=self.chunk_stop_at_first
+                        ))
+                    report['changes'].append(change)
                     report['defacement_detected'] = True
             else:
                 report['changes'].append({
@@ -98,10 +291,159 @@ class DefacementDetector:
                     'severity': 'critical'
                 })
                 report['defacement_detected'] = True
-        
-        # Update summary
-        if report['defacement_detected']:
-            num_changes = len(report['changes'])
+
+        if images:
+            record_stage('hash_images', hash_seconds)
+        if self.hash_cache is not None:
+            self.hash_cache.save()
+
+        record_mismatches(report['changes'])
+        return self.finalize_report(report)
+
+    @staticmethod
+    def compare_zones(zones: Dict, current_zones: Dict[str, ZoneResult], page: Optional[str] = None) -> List[Dict]:
+        """Changes between baseline zones and the current zone hashes of one page"""
+        changes = []
+        for zone_id, zone_data in zones.items():
+            current = current_zones.get(zone_id)
+            if current is None:
+                change = {
+                    'type': 'zone',
+                    'zone': zone_id,
+                    'description': f'Zone "{zone_id}" is missing from page',
+                    'severity': 'critical'
+                }
+            elif current.hash != zone_data['hash']:
+                change = {
+                    'type': 'zone',
+                    'zone': zone_id,
+                    'expected_hash': zone_data['hash'],
+                    'current_hash': current.hash,
+                    'description': f'Zone "{zone_id}" content has been modified',
+                    'current_preview': current.preview
+                }
+                if zone_data.get('tree') and current.tree:
+                    change['changed_elements'] = diff_zone_trees(zone_data['tree'], current.tree, f'#{zone_id}')
+            else:
+                continue
+            if page is not None:
+                change['page'] = page
+            changes.append(change)
+        return changes
+
+    async def check_site_async(self, baseline: Dict) -> Dict:
+        """Check every page and asset recorded by a crawl baseline"""
+        if 0 < self.shard_threshold <= len(baseline['pages']) + len(baseline.get('assets', {})):
+            report = await self._sharded_verifier.verify(baseline)
+            self.record_site_metrics(report)
+            return self.finalize_report(report)
+
+        zone_ids = set()
+        for page in baseline['pages'].values():
+            zone_ids.update(page['zones'])
+        crawler = SiteCrawler(
+            sorted(zone_ids), concurrency=self.crawl_concurrency,
+            per_host_limit=self.crawl_per_host_limit, fetch_timeout=self.fetch_timeout
+        )
+        current = await crawler.snapshot(baseline['pages'], baseline.get('assets', {}))
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.compare_site, baseline, current)
+
+    def compare_site(self, baseline: Dict, current: Dict) -> Dict:
+        """Build a report from a crawl baseline and a snapshot of the same URLs"""
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "defacement_detected": False,
+            "changes": self.site_changes(baseline['pages'], baseline.get('assets', {}), current),
+            "summary": "No changes detected",
+            "pages_checked": len(baseline['pages']),
+            "assets_checked": len(baseline.get('assets', {})),
+            "timings": current['timings']
+        }
+        self.record_site_metrics(report)
+        return self.finalize_report(report)
+
+    @staticmethod
+    def record_site_metrics(report: Dict):
+        for name, seconds in report['timings'].items():
+            stage = SITE_STAGES.get(name)
+            if stage is not None:
+                record_stage(stage, seconds)
+        record_mismatches(report['changes'])
+
+    @classmethod
+    def site_changes(cls, pages: Dict, assets: Dict, current: Dict) -> List[Dict]:
+        """Changes between recorded pages/assets and a snapshot of the same URLs"""
+        changes = []
+        for url, page in pages.items():
+            if url not in current['pages']:
+                changes.append({
+                    'type': 'page',
+                    'page': url,
+                    'description': f'Page "{url}" could not be fetched: {current["errors"].get(url)}',
+                    'severity': 'critical'
+                })
+                continue
+            changes.extend(cls.compare_zones(page['zones'], current['pages'][url]['zones'], page=url))
+
+        for url, asset in assets.items():
+            current_asset = current['assets'].get(url)
+            if current_asset is None:
+                changes.append({
+                    'type': 'asset',
+                    'asset': url,
+                    'description': f'Asset "{url}" is missing: {current["errors"].get(url)}',
+                    'severity': 'critical'
+                })
+            elif current_asset['hash'] != asset['hash']:
+                changes.append({
+                    'type': 'asset',
+                    'asset': url,
+                    'expected_hash': asset['hash'],
+                    'current_hash': current_asset['hash'],
+                    'expected_size': asset['size'],
+                    'current_size': current_asset['size'],
+                    'description': f'Asset "{url}" has been replaced or modified'
+                })
+        return changes
+
+    @staticmethod
+    def _legacy_zone_hashes(html_content: str, zone_ids: Iterable[str]) -> Dict[str, ZoneResult]:
+        """Version 1 zone hashes: full BeautifulSoup parse, serialize and normalize each zone"""
+        from bs4 import BeautifulSoup
+
+        timings = {'parse': 0.0, 'normalize': 0.0, 'hash': 0.0}
+        started = time.perf_counter()
+        soup = BeautifulSoup(html_content, 'html.parser')
+        timings['parse'] += time.perf_counter() - started
+        results = {}
+        for zone_id in zone_ids:
+            started = time.perf_counter()
+            zone_element = soup.find(id=zone_id)
+            if zone_element:
+                markup = str(zone_element)
+                normalize_started = time.perf_counter()
+                normalized = normalize_html(markup)
+                hash_started = time.perf_counter()
+                zone_hash = calculate_string_hash(normalized)
+                timings['parse'] += normalize_started - started
+                timings['normalize'] += hash_started - normalize_started
+                timings['hash'] += time.perf_counter() - hash_started
+                results[zone_id] = ZoneResult(zone_hash, zone_element.get_text()[:100].strip())
+            else:
+                timings['parse'] += time.perf_counter() - started
+        for stage, seconds in timings.items():
+            record_stage(stage, seconds)
+        return results
+
+    @staticmethod
+    def finalize_report(report: Dict) -> Dict:
+        """Set the detection flag and summary from the report's changes"""
+        num_changes = len(report['changes'])
+        report['defacement_detected'] = num_changes > 0
+        if num_changes:
             report['summary'] = f"{num_changes} change{'s' if num_changes != 1 else ''} detected"
-        
+        else:
+            report['summary'] = "No changes detected"
         return report
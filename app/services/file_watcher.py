@@ -0,0 +1,170 @@
+"""
+File Watcher - Event-driven re-checks of baseline entries when static files or templates change
+"""
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.services.baseline_manager import BaselineManager
+from app.services.monitor_scheduler import MonitorScheduler
+from app.utils import inotify
+from app.utils.page_cache import PageCache
+
+logger = logging.getLogger(__name__)
+
+
+class FileWatcher:
+    def __init__(self, scheduler: MonitorScheduler, url: str, static_dir: str = "app/static",
+                 template_dir: str = "app/templates", debounce_seconds: float = 0.2,
+                 max_delay_seconds: float = 0.8, page_cache: Optional[PageCache] = None):
+        self.scheduler = scheduler
+        self.url = url
+        self.static_dir = Path(static_dir).resolve()
+        self.template_dir = Path(template_dir).resolve()
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.page_cache = page_cache
+
+        self._inotify: Optional[inotify.Inotify] = None
+        self._watches: Dict[int, Path] = {}
+        self._pending: Set[Path] = set()
+        self._first_event_at: Optional[float] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._inotify is not None
+
+    def start(self) -> bool:
+        """Start watching; returns False when inotify is unavailable and polling must be relied on"""
+        if self._inotify is not None:
+            return True
+        if not inotify.is_supported():
+            logger.warning("inotify is not available, falling back to polling only")
+            return False
+
+        try:
+            self._inotify = inotify.Inotify()
+            for root in (self.static_dir, self.template_dir):
+                self._watch_tree(root)
+        except OSError as e:
+            logger.warning(f"Could not start file watcher, falling back to polling only: {e}")
+            self.stop()
+            return False
+
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._inotify.fd, self._on_readable)
+        logger.info(f"Watching {len(self._watches)} directories for changes")
+        return True
+
+    def stop(self):
+        """Stop watching and drop any pending changes"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._inotify is not None:
+            if self._loop is not None:
+                self._loop.remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+        self._watches = {}
+        self._pending = set()
+
+    def _watch_tree(self, root: Path):
+        for dirpath, _, _ in os.walk(root):
+            wd = self._inotify.add_watch(dirpath)
+            self._watches[wd] = Path(dirpath)
+
+    def _on_readable(self):
+        for event in self._inotify.read_events():
+            if event.mask & inotify.IN_Q_OVERFLOW:
+                # Events were dropped, so every entry has to be re-checked
+                self._pending.update({self.static_dir, self.template_dir})
+                continue
+            if event.mask & inotify.IN_IGNORED:
+                self._watches.pop(event.wd, None)
+                continue
+
+            directory = self._watches.get(event.wd)
+            if directory is None:
+                continue
+            path = directory / event.name if event.name else directory
+            if event.mask & inotify.IN_ISDIR and event.mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                self._watch_tree(path)
+            self._pending.add(path)
+
+        if self._pending:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Debounce bursts, but never hold changes back longer than max_delay_seconds"""
+        now = self._loop.time()
+        if self._first_event_at is None:
+            self._first_event_at = now
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        deadline = self._first_event_at + self.max_delay_seconds
+        self._flush_handle = self._loop.call_at(min(now + self.debounce_seconds, deadline), self._flush)
+
+    def _flush(self):
+        changed, self._pending = self._pending, set()
+        self._first_event_at = None
+        self._flush_handle = None
+
+        # The hash cache needs nothing here, since its entries are keyed on stat identity (inode,
+        # size, mtime, ctime). Rendered pages must not outlive their templates, though, or the
+        # re-check would be served the old page
+        if self.page_cache is not None and any(
+            path == self.template_dir or self.template_dir in path.parents for path in changed
+        ):
+            self.page_cache.invalidate()
+
+        task = asyncio.ensure_future(self._recheck(changed))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def affected_entries(self, baseline: Dict, changed: Set[Path]) -> Tuple[List[str], List[str]]:
+        """Map changed paths to the baseline zones and images they back"""
+        zone_ids: Set[str] = set()
+        image_ids: Set[str] = set()
+
+        for img_id, img_data in baseline.get('images', {}).items():
+            img_path = self.static_dir / img_data['path'].replace('/static/', '')
+            if any(img_path == path or path in img_path.parents for path in changed):
+                image_ids.add(img_id)
+
+        for template, zones in BaselineManager.ZONE_TEMPLATES.items():
+            template_path = self.template_dir / template
+            if any(template_path == path or path in template_path.parents for path in changed):
+                zone_ids.update(zones)
+
+        zone_ids &= set(baseline.get('zones', {}))
+        return sorted(zone_ids), sorted(image_ids)
+
+    async def _recheck(self, changed: Set[Path]):
+        baseline = self.scheduler.baseline_loader()
+        if baseline is None:
+            return
+        if baseline.get('pages'):
+            # Crawl baselines key assets by URL and record zones per page, so
+            # a local change can't be mapped to entries: check the whole site
+            logger.info("Change detected, re-checking the crawled site")
+            try:
+                await self.scheduler.run_check(self.url, conditional=False)
+            except Exception as e:
+                logger.error(f"Watch re-check failed for {self.url}: {e}", exc_info=True)
+            return
+
+        zone_ids, image_ids = self.affected_entries(baseline, changed)
+        if not zone_ids and not image_ids:
+            return
+
+        logger.info(f"Change detected, re-checking zones {zone_ids} and images {image_ids}")
+        try:
+            await self.scheduler.run_partial_check(self.url, zone_ids, image_ids)
+        except Exception as e:
+            logger.error(f"Watch re-check failed for {self.url}: {e}", exc_info=True)
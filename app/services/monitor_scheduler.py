@@ -0,0 +1,161 @@
+"""
+Monitor Scheduler - Runs defacement checks in the background and keeps the latest report per target
+"""
+import asyncio
+import json
+import logging
+import random
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.config import MonitorTarget
+from app.services.defacement_detector import DefacementDetector
+from app.utils.file_utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+class MonitorScheduler:
+    def __init__(self, detector: DefacementDetector, baseline_loader: Callable[[], Optional[Dict]],
+                 targets: List[MonitorTarget], max_concurrency: int = 4, data_dir: str = "data"):
+        self.detector = detector
+        self.baseline_loader = baseline_loader
+        self.targets = targets
+        self.target_urls = frozenset(target.url for target in targets)
+        self.max_concurrency = max_concurrency
+        self.reports_file = Path(data_dir) / "reports.json"
+        # Turned off after a failed write, e.g. on a read-only deployment
+        self.persist = True
+
+        self._reports: Dict[str, Dict] = self._load_reports()
+        self._tasks: List[asyncio.Task] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Created on first use, so it belongs to the loop that runs the checks
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    def _load_reports(self) -> Dict[str, Dict]:
+        """Restore the reports persisted by a previous run"""
+        if not self.reports_file.exists():
+            return {}
+        try:
+            with open(self.reports_file, 'r') as f:
+                reports = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable reports file: {e}")
+            return {}
+        # Drop targets that are no longer configured
+        return {url: report for url, report in reports.items() if self.is_target(url)}
+
+    def is_target(self, url: str) -> bool:
+        return url in self.target_urls
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """Start one monitoring loop per target on the running event loop"""
+        if self._tasks:
+            return
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        for target in self.targets:
+            self._tasks.append(asyncio.create_task(self._run_target(target)))
+        logger.info(f"Monitoring {len(self.targets)} target(s), max concurrency {self.max_concurrency}")
+
+    async def stop(self):
+        """Cancel all monitoring loops and wait for them to finish"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run_target(self, target: MonitorTarget):
+        # Spread the first checks out so targets don't all fire at startup
+        delay = random.uniform(0, target.jitter_seconds)
+        while True:
+            await asyncio.sleep(delay)
+            async with self._semaphore:
+                try:
+                    await self.run_check(target.url)
+                except Exception as e:
+                    logger.error(f"Monitoring check failed for {target.url}: {e}", exc_info=True)
+            jitter = random.uniform(-target.jitter_seconds, target.jitter_seconds)
+            delay = max(0.0, target.interval_seconds + jitter)
+
+    async def run_check(self, url: str, conditional: bool = True) -> Optional[Dict]:
+        """Check one target now and store the result as its latest report"""
+        baseline = self.baseline_loader()
+        if baseline is None:
+            return None
+        report = await self.detector.check_defacement_async(baseline, url, conditional=conditional)
+        await self.record_report(url, report)
+        return report
+
+    async def run_partial_check(self, url: str, zone_ids: List[str], image_ids: List[str]) -> Optional[Dict]:
+        """Re-check a subset of baseline entries and fold the result into the latest report
+
+        These checks follow a local file change, so they never send stored
+        validators: the page is known to have changed and must be hashed.
+        Crawl baselines always get a full site check, since their changes
+        are per page and can't be merged by zone id.
+        """
+        baseline = self.baseline_loader()
+        if baseline is None:
+            return None
+        previous = self._reports.get(url)
+        if previous is None or 'error' in previous or baseline.get('pages'):
+            # Nothing to merge into, so fall back to a full check
+            return await self.run_check(url, conditional=False)
+
+        partial = await self.detector.check_entries_async(baseline, url, zone_ids, image_ids, conditional=False)
+        if 'error' in partial:
+            await self.record_report(url, partial)
+            return partial
+
+        rechecked = {('zone', zone_id) for zone_id in zone_ids} | {('image', img_id) for img_id in image_ids}
+        kept = [
+            change for change in previous['changes']
+            if (change['type'], change.get('zone', change.get('image'))) not in rechecked
+        ]
+        report = dict(partial, changes=kept + partial['changes'])
+        report['rechecked'] = {'zones': zone_ids, 'images': image_ids}
+        self.detector.finalize_report(report)
+        await self.record_report(url, report)
+        return report
+
+    async def record_report(self, url: str, report: Dict):
+        """Store a report as the latest for its target and persist all reports
+
+        Only configured targets are stored, so checks of arbitrary URLs can't
+        grow the reports file. Writes are serialized and each one snapshots
+        the reports after taking the lock, so concurrent checks (scheduler,
+        watcher, /check) can't overwrite the file with an older set of reports.
+        """
+        report['target'] = url
+        if not self.is_target(url):
+            return
+        self._reports[url] = report
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        async with self._write_lock:
+            if not self.persist:
+                return
+            try:
+                await asyncio.to_thread(atomic_write_json, self.reports_file, dict(self._reports))
+            except OSError as e:
+                logger.warning(f"Could not write {self.reports_file}, keeping reports in memory only: {e}")
+                self.persist = False
+
+    def get_latest_report(self, url: str) -> Optional[Dict]:
+        """Return the latest stored report for a target without checking it"""
+        return self._reports.get(url)
+
+    def clear_reports(self):
+        """Forget all stored reports, e.g. after the baseline is removed"""
+        self._reports = {}
+        try:
+            self.reports_file.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove {self.reports_file}: {e}")
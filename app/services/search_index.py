@@ -0,0 +1,371 @@
+"""
+Search Index - Inverted index over department and service text
+
+Terms map to documents grouped by field-weighted term frequency. A query
+matches documents containing every query token, where a token matches
+exactly, as a prefix of an indexed term (last token only, for
+search-as-you-type), or within one edit when it is not a known term.
+Typo candidates come from a single-deletion index (symmetric delete), so
+no query ever scans the vocabulary. Results are ranked by the sum of
+weight * idf * match quality across tokens.
+
+CatalogSearch keeps one index per collection in step with a MockDatabase
+by listening to its mutations, so updates cost only the rows that changed.
+"""
+import heapq
+import logging
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from app.models import Department, Service
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Field weights: a hit in a name outranks one in a description
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "description": 1.0,
+    "requirements": 0.5,
+}
+
+EXACT_MATCH = 1.0
+TYPO_MATCH = 0.5
+# Prefix matches score between these, closer completions higher
+PREFIX_MATCH_MIN = 0.5
+PREFIX_MATCH_MAX = 0.9
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def deletes(term: str) -> Set[str]:
+    """Every string one deletion away from term"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion, substitution or adjacent swap"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        # One substitution, or one transposition of adjacent characters
+        return a[i + 1:] == b[i + 1:] or (
+            i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:])
+    # b has one extra character at i
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    """Inverted index with impact-ordered postings
+
+    Each term's postings are grouped into tiers by weight, so a query can
+    walk documents best-first and stop once the top results are settled
+    and ``max_total`` matches have been counted, instead of scoring every
+    document that contains a common word. Totals past ``max_total`` are
+    reported as a lower bound.
+    """
+
+    def __init__(self, min_prefix_length: int = 2, max_expansions: int = 64, min_typo_length: int = 4,
+                 max_total: int = 1000, field_weights: Optional[Dict[str, float]] = None):
+        self.min_prefix_length = min_prefix_length
+        self.max_expansions = max_expansions
+        self.min_typo_length = min_typo_length
+        self.max_total = max_total
+        self.field_weights = field_weights or FIELD_WEIGHTS
+
+        # term -> weight -> documents with that weight (dicts as ordered sets)
+        self._postings: Dict[str, Dict[float, Dict[Hashable, None]]] = {}
+        # term -> number of documents containing it
+        self._df: Dict[str, int] = {}
+        self._doc_terms: Dict[Hashable, Dict[str, float]] = {}
+        # Sorted vocabulary for prefix lookups
+        self._terms: List[str] = []
+        # deletion variant -> vocabulary terms producing it, for typo lookups
+        self._deletes: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc: Hashable) -> bool:
+        return doc in self._doc_terms
+
+    def _weigh(self, fields: Dict[str, Union[str, Iterable[str]]]) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        for field, value in fields.items():
+            field_weight = self.field_weights.get(field, 1.0)
+            texts = [value] if isinstance(value, str) else value
+            for text in texts:
+                for term in tokenize(text):
+                    weights[term] = weights.get(term, 0.0) + field_weight
+        return weights
+
+    def _typo_indexed(self, term: str) -> bool:
+        # Numbers are matched exactly; they would only bloat the deletion index
+        return len(term) >= self.min_typo_length and not term.isdigit()
+
+    def _add_term(self, term: str, sorted_insert: bool):
+        self._postings[term] = {}
+        self._df[term] = 0
+        if sorted_insert:
+            insort(self._terms, term)
+        if self._typo_indexed(term):
+            for variant in deletes(term):
+                self._deletes.setdefault(variant, set()).add(term)
+
+    def _drop_term(self, term: str):
+        del self._postings[term]
+        del self._df[term]
+        index = bisect_left(self._terms, term)
+        if index < len(self._terms) and self._terms[index] == term:
+            self._terms.pop(index)
+        if self._typo_indexed(term):
+            for variant in deletes(term):
+                terms = self._deletes.get(variant)
+                if terms is not None:
+                    terms.discard(term)
+                    if not terms:
+                        del self._deletes[variant]
+
+    def add(self, doc: Hashable, fields: Dict[str, Union[str, Iterable[str]]], _sorted_insert: bool = True):
+        """Index doc, replacing whatever was indexed under it before"""
+        if doc in self._doc_terms:
+            self.remove(doc)
+        weights = self._weigh(fields)
+        self._doc_terms[doc] = weights
+        for term, weight in weights.items():
+            if term not in self._postings:
+                self._add_term(term, _sorted_insert)
+            self._postings[term].setdefault(weight, {})[doc] = None
+            self._df[term] += 1
+
+    def add_many(self, docs: Iterable[Tuple[Hashable, Dict[str, Union[str, Iterable[str]]]]]):
+        """Bulk add; the vocabulary is sorted once at the end instead of per new term"""
+        for doc, fields in docs:
+            self.add(doc, fields, _sorted_insert=False)
+        self._terms = sorted(self._postings)
+
+    def remove(self, doc: Hashable) -> bool:
+        weights = self._doc_terms.pop(doc, None)
+        if weights is None:
+            return False
+        for term, weight in weights.items():
+            tiers = self._postings[term]
+            del tiers[weight][doc]
+            if not tiers[weight]:
+                del tiers[weight]
+            self._df[term] -= 1
+            if not self._df[term]:
+                self._drop_term(term)
+        return True
+
+    def clear(self):
+        self._postings.clear()
+        self._df.clear()
+        self._doc_terms.clear()
+        self._terms = []
+        self._deletes.clear()
+
+    def _idf(self, term: str) -> float:
+        return math.log(1.0 + len(self._doc_terms) / self._df[term])
+
+    def _prefix_terms(self, token: str) -> List[Tuple[str, float]]:
+        # Scan a bounded run of the sorted vocabulary, then keep the most common completions
+        start = bisect_left(self._terms, token)
+        matches = []
+        for index in range(start, min(start + self.max_expansions * 16, len(self._terms))):
+            term = self._terms[index]
+            if not term.startswith(token):
+                break
+            if term != token:
+                matches.append(term)
+        if len(matches) > self.max_expansions:
+            matches = heapq.nlargest(self.max_expansions, matches, key=self._df.__getitem__)
+        span = PREFIX_MATCH_MAX - PREFIX_MATCH_MIN
+        return [(term, PREFIX_MATCH_MIN + span * len(token) / len(term)) for term in matches]
+
+    def _typo_terms(self, token: str) -> List[Tuple[str, float]]:
+        candidates = set(self._deletes.get(token, ()))
+        for variant in deletes(token):
+            if variant in self._postings:
+                candidates.add(variant)
+            candidates.update(self._deletes.get(variant, ()))
+        return [(term, TYPO_MATCH) for term in candidates if within_one_edit(token, term)]
+
+    def expand(self, token: str, prefix: bool = False) -> List[Tuple[str, float]]:
+        """Indexed terms a query token matches, with their match quality"""
+        terms = []
+        exact = token in self._postings
+        if exact:
+            terms.append((token, EXACT_MATCH))
+        if prefix and len(token) >= self.min_prefix_length:
+            terms.extend(self._prefix_terms(token))
+        if not exact and len(token) >= self.min_typo_length and not token.isdigit():
+            terms.extend(self._typo_terms(token))
+        return terms
+
+    def _tiers(self, terms: List[Tuple[str, float]]) -> Iterator[Tuple[float, Dict[Hashable, None]]]:
+        """(score, documents) tiers across a token's matching terms, best first"""
+        heap = []
+        for position, (term, boost) in enumerate(terms):
+            weights = sorted(self._postings[term], reverse=True)
+            heap.append((-weights[0] * boost, position, 0, weights, term, boost))
+        heapq.heapify(heap)
+        while heap:
+            score, position, index, weights, term, boost = heapq.heappop(heap)
+            yield -score, self._postings[term][weights[index]]
+            if index + 1 < len(weights):
+                heapq.heappush(heap, (-weights[index + 1] * boost, position, index + 1, weights, term, boost))
+
+    def search(self, query: str, limit: int = 20) -> Tuple[List[Tuple[Hashable, float]], int, bool]:
+        """Top documents matching every token of query, the number of matches, and whether it is exact
+
+        The last token also matches as a prefix. The rarest token drives
+        the walk in descending score order; the others are probed per
+        document, and the walk stops as soon as no unseen document could
+        still enter the top results and max_total matches are counted.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return [], 0, True
+
+        expanded = []
+        for position, token in enumerate(tokens):
+            terms = self.expand(token, prefix=position == len(tokens) - 1)
+            if not terms:
+                return [], 0, True
+            expanded.append([(term, quality * self._idf(term)) for term, quality in terms])
+        expanded.sort(key=lambda terms: sum(self._df[term] for term, _ in terms))
+        driver, others = expanded[0], expanded[1:]
+        # The most the probed tokens could add to any document's score
+        others_max = sum(max(max(self._postings[term]) * boost for term, boost in terms) for terms in others)
+
+        doc_terms = self._doc_terms
+        top: List[Tuple[float, int, Hashable]] = []
+        seen: Set[Hashable] = set()
+        matches = 0
+        for driver_score, docs in self._tiers(driver):
+            bound = driver_score + others_max
+            if matches >= self.max_total and len(top) == limit and top[0][0] >= bound:
+                return self._ranked(top), matches, False
+            for doc in docs:
+                if doc in seen:
+                    # Already scored through a better-matching term
+                    continue
+                seen.add(doc)
+                score = driver_score
+                doc_weights = doc_terms[doc]
+                for terms in others:
+                    best = 0.0
+                    for term, boost in terms:
+                        weight = doc_weights.get(term)
+                        if weight is not None and weight * boost > best:
+                            best = weight * boost
+                    if not best:
+                        break
+                    score += best
+                else:
+                    matches += 1
+                    # Ties keep the document found first
+                    entry = (score, -matches, doc)
+                    if len(top) < limit:
+                        heapq.heappush(top, entry)
+                    elif entry > top[0]:
+                        heapq.heapreplace(top, entry)
+                    if matches >= self.max_total and len(top) == limit and top[0][0] >= bound:
+                        return self._ranked(top), matches, False
+        return self._ranked(top), matches, True
+
+    @staticmethod
+    def _ranked(top: List[Tuple[float, int, Hashable]]) -> List[Tuple[Hashable, float]]:
+        return [(doc, score) for score, _, doc in sorted(top, reverse=True)]
+
+
+def department_fields(department: Department) -> Dict[str, Union[str, List[str]]]:
+    return {"name": department.name, "description": department.description}
+
+
+def service_fields(service: Service) -> Dict[str, Union[str, List[str]]]:
+    return {"name": service.name, "description": service.description, "requirements": service.requirements}
+
+
+class CatalogSearch:
+    """Search over a MockDatabase's departments and services
+
+    Each collection has its own index, so a search restricted to
+    departments never walks service postings. attach() builds both once
+    and subscribes to the database, after which each add/update/remove
+    reindexes only that row.
+    """
+
+    FIELDS = {"department": department_fields, "service": service_fields}
+
+    def __init__(self, **index_options):
+        self.indexes: Dict[str, SearchIndex] = {kind: SearchIndex(**index_options) for kind in self.FIELDS}
+        self.db = None
+
+    @property
+    def attached(self) -> bool:
+        return self.db is not None
+
+    def attach(self, db):
+        if self.db is db:
+            return
+        if self.db is not None:
+            self.db.remove_listener(self._on_change)
+        self.db = db
+        for kind in self.indexes:
+            self.rebuild(kind)
+        db.add_listener(self._on_change)
+
+    def _rows(self, kind: str) -> List[Union[Department, Service]]:
+        return self.db.get_all_departments() if kind == "department" else self.db.get_all_services()
+
+    def _row(self, kind: str, row_id: int) -> Optional[Union[Department, Service]]:
+        return self.db.get_department_by_id(row_id) if kind == "department" else self.db.get_service_by_id(row_id)
+
+    def rebuild(self, kind: str):
+        index, fields = self.indexes[kind], self.FIELDS[kind]
+        index.clear()
+        index.add_many((row.id, fields(row)) for row in self._rows(kind))
+        logger.info(f"Search index built over {len(index)} {kind} rows")
+
+    def _on_change(self, kind: str, old: Optional[Union[Department, Service]],
+                   new: Optional[Union[Department, Service]]):
+        if old is None and new is None:
+            # A whole collection was reloaded
+            self.rebuild(kind)
+        elif new is None:
+            self.indexes[kind].remove(old.id)
+        else:
+            self.indexes[kind].add(new.id, self.FIELDS[kind](new))
+
+    def search(self, query: str, limit: int = 20, kind: Optional[str] = None
+               ) -> Tuple[List[Tuple[str, float, Union[Department, Service]]], int, bool]:
+        """(kind, score, row) for the best matches, the number of matches, and whether that number is exact"""
+        hits = []
+        total, exact = 0, True
+        for index_kind in ([kind] if kind else self.indexes):
+            index_hits, index_total, index_exact = self.indexes[index_kind].search(query, limit=limit)
+            hits.extend((index_kind, score, row_id) for row_id, score in index_hits)
+            total += index_total
+            exact = exact and index_exact
+
+        results = []
+        for hit_kind, score, row_id in heapq.nlargest(limit, hits, key=lambda hit: hit[1]):
+            row = self._row(hit_kind, row_id)
+            if row is not None:
+                results.append((hit_kind, score, row))
+        return results, total, exact
@@ -0,0 +1,166 @@
+"""
+Sharded Verifier - Splits large crawl baselines across worker processes
+
+Each worker process fetches, parses and hashes the pages and assets of its
+shard and sends back only the changes it found, so the parent never holds
+more than the report itself and zone parsing runs on every core instead of
+under one GIL.
+"""
+import asyncio
+import hashlib
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from app.utils.zone_extractor import extract_zones
+
+# requests and the process pool are imported on first use, which keeps them out of cold starts
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+    import requests
+
+# Fetch threads per worker process, so downloads overlap with parsing
+FETCH_THREADS = 8
+READ_SIZE = 64 * 1024
+
+
+def shard_for(key: str, shard_count: int) -> int:
+    """Stable shard index for a URL, the same in every process"""
+    return zlib.crc32(key.encode('utf-8')) % shard_count
+
+
+def _fetch(session: "requests.Session", url: str, kind: str,
+           timeout: float) -> Tuple[Optional[str], Optional[Dict], float]:
+    """Fetch a URL, returning (html, None, seconds) for pages or (None, asset entry, seconds) otherwise"""
+    started = time.perf_counter()
+    with session.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        if kind == 'page' and 'html' in response.headers.get('content-type', ''):
+            return response.text, None, time.perf_counter() - started
+        sha256_hash = hashlib.sha256()
+        size = 0
+        for block in response.iter_content(READ_SIZE):
+            sha256_hash.update(block)
+            size += len(block)
+    return None, {'hash': sha256_hash.hexdigest(), 'size': size}, time.perf_counter() - started
+
+
+def verify_shard(shard: Dict) -> Dict:
+    """Check one shard of a crawl baseline; runs in a worker process
+
+    Returns {'changes': [...], 'timings': {...}} with changes in the same
+    format as DefacementDetector.compare_site.
+    """
+    import requests
+
+    from app.services.defacement_detector import DefacementDetector
+
+    timings: Dict[str, float] = defaultdict(float)
+    current: Dict[str, Dict] = {'pages': {}, 'assets': {}, 'errors': {}}
+    urls = [(url, 'page') for url in shard['pages']] + [(url, 'asset') for url in shard['assets']]
+
+    def fetch(item):
+        try:
+            return _fetch(session, item[0], item[1], shard['fetch_timeout']), None
+        except Exception as e:
+            return None, str(e)
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=FETCH_THREADS) as pool:
+        # map yields in order, so parsing page N overlaps with fetching the ones after it
+        for (url, kind), (result, error) in zip(urls, pool.map(fetch, urls)):
+            if error is not None:
+                current['errors'][url] = error
+                continue
+            html_content, asset, elapsed = result
+            timings['fetch' if kind == 'page' else 'fetch_assets'] += elapsed
+            if kind == 'asset':
+                current['assets'][url] = asset
+            elif html_content is None:
+                current['errors'][url] = "Page is no longer served as HTML"
+            else:
+                started = time.perf_counter()
+                zones = extract_zones(html_content, shard['zone_ids'], build_tree=True)
+                timings['hash_zones'] += time.perf_counter() - started
+                current['pages'][url] = {'zones': zones}
+
+    changes = DefacementDetector.site_changes(shard['pages'], shard['assets'], current)
+    return {'changes': changes, 'timings': dict(timings)}
+
+
+class ShardedVerifier:
+    def __init__(self, workers: int = 4, fetch_timeout: float = 5.0):
+        self.workers = max(1, workers)
+        self.fetch_timeout = fetch_timeout
+        self._pool: Optional["ProcessPoolExecutor"] = None
+
+    def _get_pool(self) -> "ProcessPoolExecutor":
+        """Return the worker pool, starting it on first use"""
+        if self._pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn, not fork: the parent has an event loop and threads running
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def build_shards(self, baseline: Dict) -> List[Dict]:
+        """Split the pages and assets of a crawl baseline by URL"""
+        zone_ids = set()
+        for page in baseline['pages'].values():
+            zone_ids.update(page['zones'])
+
+        shards = [{
+            'pages': {},
+            'assets': {},
+            'zone_ids': sorted(zone_ids),
+            'fetch_timeout': self.fetch_timeout
+        } for _ in range(self.workers)]
+        for url, page in baseline['pages'].items():
+            shards[shard_for(url, self.workers)]['pages'][url] = page
+        for url, asset in baseline.get('assets', {}).items():
+            shards[shard_for(url, self.workers)]['assets'][url] = asset
+
+        return [shard for shard in shards if shard['pages'] or shard['assets']]
+
+    async def verify(self, baseline: Dict) -> Dict:
+        """Check every page and asset of a crawl baseline across the worker processes
+
+        The report has the same shape as DefacementDetector.compare_site;
+        stage timings are summed across workers and 'total' is wall-clock time.
+        """
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        shards = self.build_shards(baseline)
+        results = await asyncio.gather(*(loop.run_in_executor(pool, verify_shard, shard) for shard in shards))
+
+        changes: List[Dict] = []
+        timings: Dict[str, float] = defaultdict(float)
+        for result in results:
+            changes.extend(result['changes'])
+            for stage, seconds in result['timings'].items():
+                timings[stage] += seconds
+
+        report_timings = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+        report_timings['total'] = round(time.perf_counter() - started, 4)
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "defacement_detected": False,
+            "changes": changes,
+            "summary": "No changes detected",
+            "pages_checked": len(baseline['pages']),
+            "assets_checked": len(baseline.get('assets', {})),
+            "shards": len(shards),
+            "timings": report_timings
+        }
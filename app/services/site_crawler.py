@@ -0,0 +1,249 @@
+"""
+Site Crawler - Discovers same-origin pages and assets and hashes them concurrently
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import defaultdict
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+
+from app.utils.zone_extractor import extract_zones
+
+# httpx is imported when a crawl starts, which keeps it out of cold starts
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# (tag, attribute) pairs that reference other pages or assets
+PAGE_LINKS = {('a', 'href')}
+ASSET_LINKS = {('img', 'src'), ('script', 'src'), ('link', 'href'), ('source', 'src'), ('video', 'src'),
+               ('audio', 'src'), ('iframe', 'src'), ('embed', 'src'), ('object', 'data')}
+
+
+class LinkExtractor(HTMLParser):
+    """Collect page links and asset references from a document"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pages: List[str] = []
+        self.assets: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if not value:
+                continue
+            if (tag, name) in PAGE_LINKS:
+                self.pages.append(value)
+            elif (tag, name) in ASSET_LINKS:
+                self.assets.append(value)
+
+
+def extract_links(html_content: str) -> Tuple[List[str], List[str]]:
+    parser = LinkExtractor()
+    parser.feed(html_content)
+    parser.close()
+    return parser.pages, parser.assets
+
+
+class SiteCrawler:
+    def __init__(self, zone_ids: Iterable[str], max_pages: int = 500, concurrency: int = 16,
+                 per_host_limit: int = 8, fetch_timeout: float = 10.0):
+        self.zone_ids = list(zone_ids)
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.per_host_limit = per_host_limit
+        self.fetch_timeout = fetch_timeout
+
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._timings: Dict[str, float] = defaultdict(float)
+
+    def _client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        return httpx.AsyncClient(
+            timeout=self.fetch_timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        )
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    @staticmethod
+    def _normalize(base: str, link: str, origin: str) -> Optional[str]:
+        url, _ = urldefrag(urljoin(base, link.strip()))
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or f"{parts.scheme}://{parts.netloc}" != origin:
+            return None
+        if not parts.path:
+            # http://host and http://host/ are the same page
+            url = urlunsplit(parts._replace(path='/'))
+        return url
+
+    async def _fetch_page(self, client: "httpx.AsyncClient", url: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Fetch a URL, returning (html, None) for pages or (None, asset entry) for anything else"""
+        started = time.perf_counter()
+        async with self._host_limit(url):
+            async with client.stream('GET', url) as response:
+                response.raise_for_status()
+                if 'html' in response.headers.get('content-type', ''):
+                    await response.aread()
+                    self._timings['fetch'] += time.perf_counter() - started
+                    return response.text, None
+                entry = await self._hash_stream(response)
+        self._timings['fetch'] += time.perf_counter() - started
+        return None, entry
+
+    @staticmethod
+    async def _hash_stream(response: "httpx.Response") -> Dict:
+        sha256_hash = hashlib.sha256()
+        size = 0
+        async for block in response.aiter_bytes():
+            sha256_hash.update(block)
+            size += len(block)
+        return {'hash': sha256_hash.hexdigest(), 'size': size}
+
+    async def hash_asset(self, client: "httpx.AsyncClient", url: str) -> Dict:
+        started = time.perf_counter()
+        async with self._host_limit(url):
+            async with client.stream('GET', url) as response:
+                response.raise_for_status()
+                entry = await self._hash_stream(response)
+        self._timings['fetch_assets'] += time.perf_counter() - started
+        return entry
+
+    def _analyze_page(self, html_content: str) -> Tuple[Dict, List[str], List[str], Dict[str, float]]:
+        """Hash zones and collect links; runs on an executor thread"""
+        started = time.perf_counter()
+        zones = extract_zones(html_content, self.zone_ids, build_tree=True)
+        parsed = time.perf_counter()
+        pages, assets = extract_links(html_content)
+        timings = {'hash_zones': parsed - started, 'extract_links': time.perf_counter() - parsed}
+        return {
+            zone_id: {'hash': zone.hash, 'content_preview': zone.preview, 'tree': zone.tree}
+            for zone_id, zone in zones.items()
+        }, pages, assets, timings
+
+    def _add_timings(self, timings: Dict[str, float]):
+        for stage, seconds in timings.items():
+            self._timings[stage] += seconds
+
+    async def crawl(self, root_url: str) -> Dict:
+        """Crawl same-origin pages from root_url and hash their zones and every referenced asset
+
+        Returns {'pages': {url: {'zones': ...}}, 'assets': {url: {...}}, 'errors': {...}, 'timings': {...}}.
+        Stage timings are summed across workers; 'total' is wall-clock time.
+        """
+        parts = urlsplit(root_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        root_url = self._normalize(root_url, '', origin) or root_url
+        loop = asyncio.get_running_loop()
+        self._timings = defaultdict(float)
+        self._host_limits = {}
+        started = time.perf_counter()
+
+        pages: Dict[str, Dict] = {}
+        assets: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+        seen: Set[str] = {root_url}
+        page_count = 1
+        queue: asyncio.Queue = asyncio.Queue()
+        queue.put_nowait((root_url, 'page'))
+
+        def enqueue(base: str, links: List[str], kind: str):
+            nonlocal page_count
+            for link in links:
+                url = self._normalize(base, link, origin)
+                if url is None or url in seen:
+                    continue
+                if kind == 'page':
+                    if page_count >= self.max_pages:
+                        continue
+                    page_count += 1
+                seen.add(url)
+                queue.put_nowait((url, kind))
+
+        async with self._client() as client:
+            async def worker():
+                while True:
+                    url, kind = await queue.get()
+                    try:
+                        if kind == 'asset':
+                            assets[url] = await self.hash_asset(client, url)
+                            continue
+                        html_content, asset = await self._fetch_page(client, url)
+                        if asset is not None:
+                            assets[url] = asset
+                            continue
+                        zones, page_links, asset_links, timings = await loop.run_in_executor(
+                            None, self._analyze_page, html_content
+                        )
+                        self._add_timings(timings)
+                        pages[url] = {'zones': zones}
+                        enqueue(url, page_links, 'page')
+                        enqueue(url, asset_links, 'asset')
+                    except Exception as e:
+                        errors[url] = str(e)
+                    finally:
+                        queue.task_done()
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                await queue.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        timings = {stage: round(seconds, 4) for stage, seconds in self._timings.items()}
+        timings['total'] = round(time.perf_counter() - started, 4)
+        logger.info(f"Crawled {len(pages)} pages and {len(assets)} assets from {root_url} in {timings['total']}s")
+        return {'pages': pages, 'assets': assets, 'errors': errors, 'timings': timings}
+
+    async def snapshot(self, page_urls: Iterable[str], asset_urls: Iterable[str]) -> Dict:
+        """Hash a known set of pages and assets without following links
+
+        Page zones are returned as ZoneResult objects, ready for comparison.
+        """
+        loop = asyncio.get_running_loop()
+        self._timings = defaultdict(float)
+        self._host_limits = {}
+        started = time.perf_counter()
+        pages: Dict[str, Dict] = {}
+        assets: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async with self._client() as client:
+            async def visit(url: str, kind: str):
+                async with limit:
+                    try:
+                        if kind == 'asset':
+                            assets[url] = await self.hash_asset(client, url)
+                            return
+                        html_content, asset = await self._fetch_page(client, url)
+                        if html_content is None:
+                            errors[url] = "Page is no longer served as HTML"
+                            return
+                        started_hash = time.perf_counter()
+                        zones = await loop.run_in_executor(
+                            None, lambda: extract_zones(html_content, self.zone_ids, build_tree=True)
+                        )
+                        self._timings['hash_zones'] += time.perf_counter() - started_hash
+                        pages[url] = {'zones': zones}
+                    except Exception as e:
+                        errors[url] = str(e)
+
+            await asyncio.gather(*(visit(url, 'page') for url in page_urls),
+                                 *(visit(url, 'asset') for url in asset_urls))
+
+        timings = {stage: round(seconds, 4) for stage, seconds in self._timings.items()}
+        timings['total'] = round(time.perf_counter() - started, 4)
+        return {'pages': pages, 'assets': assets, 'errors': errors, 'timings': timings}
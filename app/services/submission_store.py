@@ -0,0 +1,235 @@
+"""
+Submission Store - Write-behind, append-only log of contact form submissions
+
+Submissions go into a bounded asyncio queue and a single background task
+appends them to a JSONL file in batches, with one fsync per batch (group
+commit). Nothing but the queue is kept in memory; reads page through the
+file by byte offset.
+
+If the log can't be written (e.g. a read-only deployment), the store logs
+it once and keeps the most recent submissions in memory instead, paged by
+record number, so the contact form keeps working.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.models import ContactForm, ContactSubmission
+
+logger = logging.getLogger(__name__)
+
+TAIL_BLOCK_SIZE = 4096
+
+
+class SubmissionStore:
+    def __init__(self, path: str = "data/submissions.jsonl", max_pending: int = 10000,
+                 batch_size: int = 256, durable_ack: bool = True, fsync: bool = True,
+                 max_in_memory: int = 1000):
+        self.path = Path(path)
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.durable_ack = durable_ack
+        self.fsync = fsync
+        # Turned off after a failed write; later submissions are kept in memory
+        self.persist = True
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._memory: Deque[str] = deque(maxlen=max_in_memory)
+        self._memory_dropped = 0
+        try:
+            self._last_id, self.count = self._scan()
+        except OSError as e:
+            self._disable_persistence(e)
+            self._last_id, self.count = 0, 0
+
+    def _scan(self) -> Tuple[int, int]:
+        """Last submission id and number of records already in the log"""
+        if not self.path.exists():
+            return 0, 0
+        self._repair_tail()
+        count = 0
+        with open(self.path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                count += block.count(b'\n')
+        last = self._last_line()
+        if not last:
+            return 0, count
+        try:
+            return json.loads(last)['id'], count
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Unreadable last record in {self.path} ({e}), numbering continues from the record count")
+            return count, count
+
+    def _repair_tail(self):
+        """Cut off a final record left without its newline by a crash mid-append
+
+        Later appends would otherwise be joined onto the partial line.
+        """
+        try:
+            with open(self.path, 'r+b') as f:
+                end = f.seek(0, os.SEEK_END)
+                if end == 0:
+                    return
+                f.seek(end - 1)
+                if f.read(1) == b'\n':
+                    return
+                keep, position = 0, end
+                while position > 0:
+                    start = max(0, position - TAIL_BLOCK_SIZE)
+                    f.seek(start)
+                    index = f.read(position - start).rfind(b'\n')
+                    if index != -1:
+                        keep = start + index + 1
+                        break
+                    position = start
+                logger.warning(f"Dropping {end - keep} bytes of a partially written record at the end of {self.path}")
+                f.truncate(keep)
+        except OSError as e:
+            logger.error(f"Could not repair {self.path}: {e}")
+
+    def _last_line(self) -> Optional[bytes]:
+        # Read backwards from the end so startup doesn't parse the whole log
+        with open(self.path, 'rb') as f:
+            end = f.seek(0, os.SEEK_END)
+            data = b''
+            while end > 0:
+                start = max(0, end - TAIL_BLOCK_SIZE)
+                f.seek(start)
+                data = f.read(end - start) + data
+                end = start
+                lines = data.rstrip(b'\n').split(b'\n')
+                if len(lines) > 1 or end == 0:
+                    return lines[-1] or None
+        return None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _disable_persistence(self, error: Exception):
+        logger.error(f"Cannot write {self.path}, keeping the last {self._memory.maxlen} submissions in memory only: {error}")
+        self.persist = False
+
+    def start(self):
+        """Start the background flusher on the running event loop"""
+        if self.running:
+            return
+        if self.persist:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                self._disable_persistence(e)
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Write out everything still queued, then stop the flusher"""
+        if not self.running:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def submit(self, form: ContactForm) -> ContactSubmission:
+        """Queue a submission for the log
+
+        The form is already validated, so the record is built without a
+        second validation pass. With durable_ack this waits for the batch
+        containing it to be written and fsynced; when the queue is full it
+        waits for room rather than dropping anything.
+        """
+        if not self.running:
+            self.start()
+        self._last_id += 1
+        submission = ContactSubmission.model_construct(
+            id=self._last_id,
+            submitted_at=datetime.now(),
+            status="pending",
+            **form.model_dump()
+        )
+        done = asyncio.get_running_loop().create_future() if self.durable_ack else None
+        await self._queue.put((submission.model_dump_json() + '\n', done))
+        if done is not None:
+            await done
+        return submission
+
+    async def _flush_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Group commit: take whatever else arrived while we were waiting
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            lines = [line for line, _ in batch]
+            try:
+                if self.persist:
+                    try:
+                        await asyncio.to_thread(self._append, lines)
+                    except OSError as e:
+                        self._disable_persistence(e)
+                if not self.persist:
+                    self._remember(lines)
+                self.count += len(batch)
+                error = None
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} submission(s): {e}", exc_info=True)
+                error = e
+            for _, done in batch:
+                if done is not None and not done.done():
+                    if error is None:
+                        done.set_result(None)
+                    else:
+                        done.set_exception(error)
+                self._queue.task_done()
+
+    def _append(self, lines: List[str]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(lines))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _remember(self, lines: List[str]):
+        for line in lines:
+            if len(self._memory) == self._memory.maxlen:
+                # The oldest one falls out of the deque
+                self._memory_dropped += 1
+            self._memory.append(line)
+
+    def read_page(self, offset: int = 0, limit: int = 100) -> Tuple[List[Dict], Optional[int]]:
+        """Up to limit records starting at byte offset, plus the offset of the next page
+
+        Blocking; call it from a thread. Offsets only ever point at line
+        starts of an append-only file, so they stay valid as it grows. Once
+        persistence is off, only the submissions kept in memory are listed
+        and offsets count records since startup.
+        """
+        if not self.persist:
+            start = max(0, offset - self._memory_dropped)
+            lines = list(self._memory)[start:start + limit]
+            next_offset = self._memory_dropped + start + len(lines)
+            more = next_offset < self._memory_dropped + len(self._memory)
+            return [json.loads(line) for line in lines], (next_offset if more else None)
+        if not self.path.exists():
+            return [], None
+        records = []
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            while len(records) < limit:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    # End of file, or a record still being written
+                    break
+                offset += len(line)
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    logger.warning(f"Skipping unreadable record in {self.path} before offset {offset}")
+            more = f.readline().endswith(b'\n')
+        return records, (offset if more else None)
@@ -0,0 +1,60 @@
+"""
+Static file serving with content-fingerprinted, immutable URLs
+
+The manifest is built once at startup. Requests for a fingerprinted name
+are answered from it with a one-year immutable Cache-Control and, for text
+assets, a precompressed body. Assets read from disk are checked against
+their build-time digest first; one that changed since is served like any
+other file, without the immutable header. Any other path falls through to
+the regular StaticFiles behaviour.
+"""
+from fastapi.responses import FileResponse, Response
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.config import settings
+from app.utils.page_cache import choose_encoding
+from app.utils.static_manifest import StaticManifest
+
+STATIC_DIR = "app/static"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+static_manifest = StaticManifest(
+    STATIC_DIR,
+    url_prefix="/static",
+    precompress=settings.static_precompress,
+    use_brotli=settings.static_brotli
+)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    def __init__(self, manifest: StaticManifest, **kwargs):
+        super().__init__(**kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.manifest.lookup(path.replace('\\', '/'))
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        if not asset.variants and not self.manifest.is_current(asset):
+            # Changed since startup: these bytes are not what the fingerprint promises, so serve
+            # them like any other static file instead of marking them immutable for a year
+            return await super().get_response(asset.path, scope)
+
+        etag = f'"{asset.digest[:32]}"'
+        headers = {'Cache-Control': IMMUTABLE_CACHE_CONTROL, 'ETag': etag}
+        if not asset.variants:
+            return FileResponse(self.manifest.static_dir / asset.path, media_type=asset.media_type,
+                                headers=headers)
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get('accept-encoding'), asset.variants)
+        headers['Vary'] = 'Accept-Encoding'
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+            headers['ETag'] = f'{etag[:-1]}-{encoding}"'
+        if request_headers.get('if-none-match') == headers['ETag']:
+            return Response(status_code=304, headers=headers)
+        return Response(content=asset.variants[encoding], media_type=asset.media_type, headers=headers)
@@ -0,0 +1,103 @@
+"""
+Shared Jinja2 environment for page serving and baseline rendering
+
+One environment means each template is compiled once per process and kept
+in memory. Compiled bytecode also goes to a filesystem cache, so other
+workers and restarts only load it instead of recompiling. auto_reload
+re-checks the source mtime, so edited templates are picked up right away.
+Pages whose output only depends on the route are served from page_cache.
+Jinja itself is imported when the first template is needed, so requests
+that never render one don't pay for it.
+"""
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.config import settings
+from app.static_assets import static_manifest
+from app.utils.lazy import Provider
+from app.utils.page_cache import PageCache, choose_encoding
+
+if TYPE_CHECKING:
+    from fastapi.templating import Jinja2Templates
+    from jinja2 import Environment, FileSystemBytecodeCache
+
+TEMPLATE_DIR = "app/templates"
+
+
+def _bytecode_cache() -> Optional["FileSystemBytecodeCache"]:
+    if not settings.template_bytecode_cache:
+        return None
+    from jinja2 import FileSystemBytecodeCache
+
+    # Without a directory Jinja uses a per-user folder in the temp dir,
+    # which is also the only writable place on Vercel
+    return FileSystemBytecodeCache(settings.template_cache_dir)
+
+
+def _environment() -> "Environment":
+    from jinja2 import Environment, FileSystemLoader
+
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        bytecode_cache=_bytecode_cache(),
+        auto_reload=True,
+        cache_size=400,
+    )
+    env.globals['static_url'] = static_manifest.url
+    return env
+
+
+def _templates() -> "Jinja2Templates":
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(env=jinja_env.get())
+
+
+jinja_env = Provider(_environment)
+templates = Provider(_templates)
+
+page_cache = PageCache(
+    TEMPLATE_DIR,
+    version=settings.page_cache_version,
+    check_interval=settings.page_cache_check_interval,
+    use_brotli=settings.page_cache_brotli
+)
+
+
+def warm_templates() -> int:
+    """Compile (or load from the bytecode cache) every template up front"""
+    env = jinja_env.get()
+    names = env.list_templates(extensions=['html'])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def render_templates(names: Iterable[str], context: Optional[Dict] = None) -> Dict[str, str]:
+    """Render several templates with the same context, returning name -> HTML"""
+    context = context or {}
+    env = jinja_env.get()
+    return {name: env.get_template(name).render(context) for name in names}
+
+
+def cached_page_response(request: Request, key: Tuple, template_name: str,
+                         context: Optional[Dict] = None) -> Response:
+    """Serve a template whose output depends only on key, from the rendered-page cache
+
+    Everything the output depends on must be part of key; the request
+    itself is not passed to the template.
+    """
+    if not settings.page_cache_enabled:
+        return templates.get().TemplateResponse(request, template_name, context or {})
+
+    page = page_cache.get(key + (template_name,), lambda: jinja_env.get().get_template(template_name).render(context or {}))
+    encoding = choose_encoding(request.headers.get('accept-encoding'), page.variants)
+    etag = page.etag if encoding == 'identity' else f'{page.etag[:-1]}-{encoding}"'
+    headers = {'ETag': etag, 'Vary': 'Accept-Encoding'}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(content=page.variants[encoding], media_type='text/html', headers=headers)
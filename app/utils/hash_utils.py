@@ -2,8 +2,27 @@
 Hash utilities for defacement detection
 """
 import hashlib
+import json
+import logging
+import mmap
+import os
+import random
+import threading
+import time
 from pathlib import Path
-from typing import Union
+from typing import Dict, List, Optional, Union
+
+from app.utils.file_utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Files at least this large are hashed through mmap instead of buffered reads
+MMAP_THRESHOLD = 1024 * 1024
+READ_BUFFER_SIZE = 1024 * 1024
+
+# Files modified this recently may still change within the same mtime tick,
+# so their hashes are not cached (the same "racily clean" rule git uses)
+RACY_WINDOW_NS = 2 * 1_000_000_000
 
 
 def calculate_string_hash(content: str) -> str:
@@ -11,21 +30,119 @@ def calculate_string_hash(content: str) -> str:
     return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 
-def calculate_file_hash(file_path: Union[str, Path]) -> str:
-    """Calculate SHA256 hash of file content"""
-    path = Path(file_path)
-    if not path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-    
+def file_identity(st: os.stat_result) -> List[int]:
+    """Stat fields that change whenever a file's content may have changed"""
+    return [st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+
+
+def is_racy(st: os.stat_result) -> bool:
+    """True if the file changed so recently that a same-tick rewrite could go unnoticed"""
+    return time.time_ns() - max(st.st_mtime_ns, st.st_ctime_ns) < RACY_WINDOW_NS
+
+
+def _hash_file_contents(path: Path, size: int) -> str:
     sha256_hash = hashlib.sha256()
     with open(path, "rb") as f:
-        # Read file in chunks to handle large files
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                sha256_hash.update(mapped)
+        else:
+            # Read file in large chunks to keep the number of syscalls low
+            for byte_block in iter(lambda: f.read(READ_BUFFER_SIZE), b""):
+                sha256_hash.update(byte_block)
     return sha256_hash.hexdigest()
 
 
+def calculate_file_hash(file_path: Union[str, Path], cache: Optional["FileHashCache"] = None) -> str:
+    """Calculate SHA256 hash of file content, reusing cached digests when a cache is given"""
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    if cache is not None:
+        return cache.get_hash(path)
+
+    return _hash_file_contents(path, path.stat().st_size)
+
+
+class FileHashCache:
+    """Persistent SHA256 cache keyed on (device, inode, size, mtime_ns, ctime_ns)"""
+
+    def __init__(self, cache_file: Optional[Union[str, Path]] = None,
+                 paranoid: bool = False, verify_rate: float = 0.05):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.paranoid = paranoid
+        self.verify_rate = verify_rate
+
+        self._entries: Dict[str, List] = self._load()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, List]:
+        if self.cache_file is None or not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable hash cache: {e}")
+            return {}
+
+    def _should_verify(self) -> bool:
+        return self.paranoid and random.random() < self.verify_rate
+
+    def get_hash(self, file_path: Union[str, Path], refresh: bool = False) -> str:
+        """Return the file's digest, hashing it only if its stat identity changed"""
+        path = Path(file_path)
+        st = path.stat()
+        key = file_identity(st)
+        cache_key = str(path)
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+        cached = entry is not None and entry[:5] == key
+
+        if cached and not refresh and not self._should_verify():
+            return entry[5]
+
+        digest = _hash_file_contents(path, st.st_size)
+        if cached and entry[5] != digest:
+            logger.warning(f"Content of {path} changed without a stat change")
+
+        with self._lock:
+            if is_racy(st):
+                self._entries.pop(cache_key, None)
+            else:
+                self._entries[cache_key] = key + [digest]
+            self._dirty = True
+        return digest
+
+    def invalidate(self, file_path: Union[str, Path]):
+        """Drop the cached digest for a path"""
+        with self._lock:
+            if self._entries.pop(str(Path(file_path)), None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Persist the cache if anything changed since the last save
+
+        If the file cannot be written (e.g. a read-only deployment), the
+        cache keeps working in memory and persistence is turned off.
+        """
+        if self.cache_file is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._entries)
+            self._dirty = False
+        try:
+            atomic_write_json(self.cache_file, snapshot, indent=None)
+        except OSError as e:
+            logger.warning(f"Could not write hash cache {self.cache_file}, keeping it in memory only: {e}")
+            self.cache_file = None
+
+
 def normalize_html(html: str) -> str:
     """Normalize HTML by removing extra whitespace"""
     # Remove extra whitespace and newlines
@@ -0,0 +1,44 @@
+"""
+Deferred construction of process-wide services
+
+Module-level singletons are built at import time, which serverless cold
+starts pay for on every new instance whether or not the request needs
+them. A Provider builds its value on first use instead and returns the
+same instance afterwards.
+"""
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+_UNSET = object()
+
+
+class Provider(Generic[T]):
+    """Build a value on first get() and return the same instance afterwards
+
+    Providers can be passed to Depends() directly. Calling one is async, so
+    FastAPI resolves it on the event loop instead of handing it to the
+    threadpool; code outside a request uses get().
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._value = _UNSET
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        value = self._value
+        if value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    self._value = self._factory()
+                value = self._value
+        return value
+
+    async def __call__(self) -> T:
+        return self.get()
+
+    def peek(self) -> Optional[T]:
+        """The value if it has been built, without building it"""
+        return None if self._value is _UNSET else self._value
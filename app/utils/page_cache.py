@@ -0,0 +1,135 @@
+"""
+Rendered-page cache with precompressed variants
+
+Pages that only change when a template changes are rendered once and kept
+as bytes, together with gzip and (when the optional ``brotli`` package is
+installed) brotli variants, so serving one is a dict lookup and a write.
+Entries are dropped when any file in the template directory gets a newer
+mtime, when the cache version is bumped, or when invalidate() is called
+(the file watcher does so as soon as a template changes, rather than
+waiting for the next mtime scan).
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Preferred order when the client accepts several encodings equally
+ENCODINGS = ('br', 'gzip', 'identity')
+
+
+class CachedPage(NamedTuple):
+    etag: str
+    variants: Dict[str, bytes]
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Map each encoding named in an Accept-Encoding header to its q-value"""
+    accepted: Dict[str, float] = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(header: Optional[str], available) -> str:
+    """Best encoding from available for an Accept-Encoding header; identity if nothing fits"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = 'identity', 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, 1.0 if encoding == 'identity' else wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_variants(body: bytes, use_brotli: bool = True) -> Dict[str, bytes]:
+    variants = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if use_brotli and brotli is not None:
+        variants['br'] = brotli.compress(body, quality=11)
+    return variants
+
+
+class PageCache:
+    def __init__(self, template_dir: str, version: str = "1", check_interval: float = 1.0,
+                 use_brotli: bool = True):
+        self.template_dir = template_dir
+        self.version = version
+        self.check_interval = check_interval
+        self.use_brotli = use_brotli
+
+        self._lock = threading.Lock()
+        self._pages: Dict[Tuple, CachedPage] = {}
+        self._templates_mtime = self._scan_mtime()
+        self._checked_at = time.monotonic()
+
+    def _scan_mtime(self) -> int:
+        """Newest mtime in the template directory, so extends/includes are covered too"""
+        newest = 0
+        for root, _, files in os.walk(self.template_dir):
+            for name in files:
+                try:
+                    newest = max(newest, os.stat(os.path.join(root, name)).st_mtime_ns)
+                except FileNotFoundError:
+                    continue
+        return newest
+
+    def _check_templates(self):
+        # Stat the templates at most once per check_interval, not on every request
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        mtime = self._scan_mtime()
+        if mtime != self._templates_mtime:
+            with self._lock:
+                self._templates_mtime = mtime
+                self._pages.clear()
+
+    def bump(self, version: Optional[str] = None):
+        """Drop every cached page, optionally switching to a new version string"""
+        with self._lock:
+            self.version = version or self.version
+            self._pages.clear()
+
+    def invalidate(self):
+        """Drop every cached page now and take the current template mtimes as the new reference"""
+        with self._lock:
+            self._templates_mtime = self._scan_mtime()
+            self._checked_at = time.monotonic()
+            self._pages.clear()
+
+    def get(self, key: Tuple, render: Callable[[], str]) -> CachedPage:
+        """Return the cached page for key, rendering and compressing it on a miss"""
+        self._check_templates()
+        cache_key = (self.version,) + key
+        page = self._pages.get(cache_key)
+        if page is not None:
+            return page
+
+        body = render().encode('utf-8')
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        page = CachedPage(etag, compress_variants(body, self.use_brotli))
+        with self._lock:
+            self._pages[cache_key] = page
+        return page
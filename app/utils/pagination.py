@@ -0,0 +1,58 @@
+"""
+Cursor pagination and NDJSON streaming helpers for list endpoints
+"""
+import base64
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar('T', bound=BaseModel)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Records per streamed chunk: large enough to keep send() calls cheap,
+# small enough that the first bytes go out right away
+NDJSON_BATCH_SIZE = 256
+
+
+def encode_cursor(position: int, kind: str = "id") -> str:
+    """Opaque cursor for a position: the last id returned, or a byte offset"""
+    return base64.urlsafe_b64encode(f"{kind}:{position}".encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, kind: str = "id") -> int:
+    """Position a cursor of the given kind points at; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    prefix, _, value = raw.partition(':')
+    if prefix != kind or not value.lstrip('-').isdigit():
+        raise ValueError("Invalid cursor")
+    return int(value)
+
+
+def paginate(records: Iterator[T], limit: int) -> Tuple[List[T], Optional[str]]:
+    """Take one page from an id-ordered iterator, plus the cursor for the next page"""
+    page = list(islice(records, limit + 1))
+    if len(page) > limit:
+        return page[:limit], encode_cursor(page[limit - 1].id)
+    return page, None
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    return NDJSON_MEDIA_TYPE in (accept or '')
+
+
+async def ndjson_stream(records: Iterable[BaseModel], batch_size: int = NDJSON_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Serialize records one JSON object per line, sending them in small batches"""
+    batch = []
+    for record in records:
+        batch.append(record.model_dump_json())
+        if len(batch) >= batch_size:
+            batch.append('')
+            yield '\n'.join(batch).encode('utf-8')
+            batch = []
+    if batch:
+        batch.append('')
+        yield '\n'.join(batch).encode('utf-8')
@@ -0,0 +1,163 @@
+"""
+Sampling profiler with collapsed-stack output
+
+A background thread snapshots the stacks of the threads doing a request's
+work (the event loop thread plus executor/worker threads) every few
+milliseconds and counts identical stacks. The result uses the collapsed
+format read by flamegraph.pl, speedscope and similar tools: one
+"frame;frame;frame count" line per distinct stack, root first.
+
+Samples cover whole threads, so work from requests running concurrently
+on the same threads shows up in the capture too.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from types import CodeType, FrameType
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional
+
+# Worker threads that are sampled alongside the thread that started profiling
+DEFAULT_THREAD_PREFIXES = ("defacement", "asyncio", "AnyIO")
+
+# Leaf frames of a worker thread waiting for work; such samples are dropped
+IDLE_LEAVES = {("_worker", "thread.py"), ("wait", "threading.py"), ("get", "queue.py")}
+
+
+def _short_path(filename: str) -> str:
+    """Path relative to site-packages or the working directory; stdlib files by name"""
+    index = filename.rfind("site-packages" + os.sep)
+    if index != -1:
+        return filename[index + len("site-packages") + 1:]
+    path = os.path.relpath(filename)
+    return os.path.basename(filename) if path.startswith("..") else path
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, max_duration: float = 30.0,
+                 thread_prefixes: Iterable[str] = DEFAULT_THREAD_PREFIXES):
+        self.interval = interval
+        self.max_duration = max_duration
+        self.thread_prefixes = tuple(thread_prefixes)
+
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self._labels: Dict[CodeType, str] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, thread_id: Optional[int] = None):
+        """Start sampling thread_id (the calling thread by default) and matching worker threads"""
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        """Stop sampling and return the collapsed stacks"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.stacks
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_duration
+        while not self._stop.wait(self.interval):
+            if time.monotonic() > deadline:
+                break
+            self._sample()
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._thread_names.get(ident)
+        if name is None:
+            # Refresh the cache only when a thread we have not seen shows up
+            self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            name = self._thread_names.get(ident, str(ident))
+        return name
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _sample(self):
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            name = self._thread_name(ident)
+            if ident != self._target:
+                if not name.startswith(self.thread_prefixes):
+                    continue
+                code = frame.f_code
+                if (code.co_name, os.path.basename(code.co_filename)) in IDLE_LEAVES:
+                    continue
+            stack = self._collapse(name, frame)
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+
+    def _collapse(self, thread_name: str, frame: Optional[FrameType]) -> str:
+        frames: List[str] = []
+        while frame is not None:
+            frames.append(self._label(frame.f_code))
+            frame = frame.f_back
+        frames.append(thread_name.replace(" ", "_"))
+        return ";".join(reversed(frames))
+
+
+def collapsed_text(stacks: Dict[str, int]) -> str:
+    """Collapsed-stack text, heaviest stacks first"""
+    lines = [f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda item: -item[1])]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+class Profile(NamedTuple):
+    id: str
+    method: str
+    path: str
+    status: Optional[int]
+    started_at: datetime
+    duration: float
+    samples: int
+    stacks: Dict[str, int]
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+        }
+
+
+class ProfileStore:
+    """The most recent profiles, oldest dropped first"""
+
+    def __init__(self, max_profiles: int = 20):
+        self._profiles: Deque[Profile] = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+        self._prefix = os.urandom(2).hex()
+
+    def next_id(self) -> str:
+        return f"{self._prefix}-{next(self._ids)}"
+
+    def add(self, profile: Profile):
+        self._profiles.append(profile)
+
+    def list(self) -> List[Profile]:
+        """Newest first"""
+        return list(reversed(self._profiles))
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return next((profile for profile in self._profiles if profile.id == profile_id), None)
@@ -0,0 +1,63 @@
+"""
+Encoded-response cache for read-heavy JSON endpoints
+
+Holds the final response bytes per (route, normalized query params) for one
+data version. When the version moves on, everything cached for the old one
+is dropped, so a mutation can never be followed by a stale response.
+"""
+import json
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple, Union
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def normalize_params(params: Dict) -> Tuple:
+    """Hashable, order-independent form of parsed query params, ignoring unset ones"""
+    return tuple(sorted((name, value) for name, value in params.items() if value is not None))
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024, enabled: bool = True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._version: Optional[Hashable] = None
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_or_build(self, version: Hashable, key: Tuple, build: Callable[[], Union[BaseModel, Dict]],
+                     exclude: Optional[Set[str]] = None) -> bytes:
+        """Encoded body for key at this data version, building it on a miss
+
+        exclude names model fields left out of the body; it must be the same
+        for every call with the same key.
+        """
+        if not self.enabled:
+            return self.encode(build(), exclude)
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+            return body
+
+        body = self.encode(build(), exclude)
+        self._entries[key] = body
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+    def response(self, version: Hashable, key: Tuple, build: Callable[[], Union[BaseModel, Dict]],
+                 exclude: Optional[Set[str]] = None) -> Response:
+        return Response(content=self.get_or_build(version, key, build, exclude), media_type="application/json")
+
+    @staticmethod
+    def encode(content: Union[BaseModel, Dict], exclude: Optional[Set[str]] = None) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json(exclude=exclude).encode('utf-8')
+        return json.dumps(content, default=str, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,128 @@
+"""
+Content-fingerprinted static asset manifest
+
+Hashes every file under the static directory once, at startup, and maps
+each one to a URL that embeds its digest (css/style.css becomes
+css/style.<digest>.css). Because the content behind such a URL can never
+change, it can be cached by clients for a year without revalidation.
+Text assets are also kept precompressed in memory.
+
+The digests are full SHA-256 file hashes, the same as the defacement
+baseline uses, so the baseline can take them from here instead of reading
+the files again.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from app.utils.hash_utils import calculate_file_hash, file_identity, is_racy
+from app.utils.page_cache import compress_variants
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_LENGTH = 12
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class StaticAsset(NamedTuple):
+    path: str
+    fingerprinted: str
+    digest: str
+    size: int
+    media_type: str
+    identity: Optional[List[int]]
+    variants: Dict[str, bytes]
+
+
+def fingerprint_path(path: str, digest: str) -> str:
+    stem, dot, suffix = path.rpartition('.')
+    if not dot or '/' in suffix:
+        return f"{path}.{digest[:FINGERPRINT_LENGTH]}"
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}.{suffix}"
+
+
+class StaticManifest:
+    def __init__(self, static_dir: str = "app/static", url_prefix: str = "/static",
+                 precompress: bool = True, use_brotli: bool = True):
+        self.static_dir = Path(static_dir)
+        self.url_prefix = url_prefix.rstrip('/')
+        self.precompress = precompress
+        self.use_brotli = use_brotli
+
+        self._assets: Dict[str, StaticAsset] = {}
+        self._fingerprinted: Dict[str, StaticAsset] = {}
+
+    def build(self) -> int:
+        """Hash (and precompress) every static file; returns the number of files"""
+        assets: Dict[str, StaticAsset] = {}
+        for root, _, files in os.walk(self.static_dir):
+            for name in files:
+                full_path = Path(root) / name
+                path = full_path.relative_to(self.static_dir).as_posix()
+                try:
+                    assets[path] = self._build_asset(full_path, path)
+                except OSError as e:
+                    logger.warning(f"Skipping static file {path}: {e}")
+
+        self._assets = assets
+        self._fingerprinted = {asset.fingerprinted: asset for asset in assets.values()}
+        return len(assets)
+
+    def _build_asset(self, full_path: Path, path: str) -> StaticAsset:
+        st = full_path.stat()
+        media_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        variants: Dict[str, bytes] = {}
+        if self.precompress and media_type.startswith(COMPRESSIBLE_TYPES):
+            # Hash the exact bytes that will be served
+            with open(full_path, 'rb') as f:
+                body = f.read()
+            variants = compress_variants(body, self.use_brotli)
+            digest = hashlib.sha256(body).hexdigest()
+        else:
+            digest = calculate_file_hash(full_path)
+
+        # The stat identity lets the baseline trust the digest while the file is unchanged;
+        # it is left out if the file was being written while it was read
+        identity: Optional[List[int]] = file_identity(st)
+        if is_racy(st) or file_identity(full_path.stat()) != identity:
+            identity = None
+        return StaticAsset(path, fingerprint_path(path, digest), digest, st.st_size, media_type, identity, variants)
+
+    def url(self, path: str) -> str:
+        """Fingerprinted URL for a static path; the plain URL if the file is not in the manifest"""
+        prefix = self.url_prefix.lstrip('/') + '/'
+        path = path.lstrip('/')
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+        asset = self._assets.get(path)
+        return f"{self.url_prefix}/{asset.fingerprinted if asset else path}"
+
+    def lookup(self, fingerprinted: str) -> Optional[StaticAsset]:
+        return self._fingerprinted.get(fingerprinted)
+
+    def digest_for(self, full_path: Union[str, Path]) -> Optional[str]:
+        """Digest recorded at build time if the file has not changed since, else None"""
+        try:
+            path = Path(full_path).relative_to(self.static_dir).as_posix()
+            asset = self._assets.get(path)
+            if asset is None or asset.identity is None:
+                return None
+            return asset.digest if file_identity(Path(full_path).stat()) == asset.identity else None
+        except (ValueError, OSError):
+            return None
+
+    def is_current(self, asset: StaticAsset) -> bool:
+        """True if the file on disk still holds the content recorded at build time
+
+        Cheap while the stat identity is unchanged; otherwise the file is hashed again.
+        """
+        full_path = self.static_dir / asset.path
+        try:
+            if asset.identity is not None and file_identity(full_path.stat()) == asset.identity:
+                return True
+            return calculate_file_hash(full_path) == asset.digest
+        except OSError:
+            return False
@@ -0,0 +1,269 @@
+"""
+Streaming zone extractor for defacement detection
+
+Makes a single pass over the HTML with the stdlib tokenizer, captures only
+the subtrees of the requested zone ids, feeds their canonical tokens
+straight into SHA-256 and stops as soon as every zone has been closed.
+
+Hashes produced here are zone hash version 2. They differ from version 1
+(BeautifulSoup serialization + normalize_html) because tokens are
+canonicalized rather than re-serialized: tag and attribute names are
+lower-cased, text is whitespace-collapsed and stripped, and whitespace-only
+text between tags is ignored.
+"""
+import hashlib
+from html import escape
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+ZONE_HASH_VERSION = 2
+
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+])
+
+PREVIEW_LENGTH = 100
+CHUNK_SIZE = 64 * 1024
+
+
+class ZoneResult(NamedTuple):
+    hash: str
+    preview: str
+    tree: Optional[Dict] = None
+
+
+class _Node:
+    """An open element inside a zone"""
+    __slots__ = ('tag', 'hasher', 'children')
+
+    def __init__(self, tag: str, hasher=None):
+        self.tag = tag
+        self.hasher = hasher
+        self.children: List[Dict] = []
+
+
+class _Capture:
+    """Hashing state for one zone that is currently open
+
+    Besides the flat token hash, each element can get a Merkle hash over its
+    own start tag, text and the hashes of its child elements, so a mismatch
+    can later be narrowed down to the elements that actually changed.
+    """
+
+    def __init__(self, zone_id: str, build_tree: bool = False):
+        self.zone_id = zone_id
+        self.build_tree = build_tree
+        self.hasher = hashlib.sha256()
+        self.open_tags: List[_Node] = []
+        self.tree: Optional[Dict] = None
+        self.preview_parts: List[str] = []
+        self.preview_len = 0
+        # Text arrives in pieces wherever feed() chunks happen to end, so it
+        # is only collapsed and hashed once the text node is complete
+        self.pending_text: List[str] = []
+
+    def token(self, token: str):
+        self.flush_text()
+        data = token.encode('utf-8') + b'\n'
+        self.hasher.update(data)
+        if self.build_tree and self.open_tags:
+            self.open_tags[-1].hasher.update(data)
+
+    def _attach(self, node: Dict):
+        if self.open_tags:
+            parent = self.open_tags[-1]
+            parent.children.append(node)
+            parent.hasher.update(node['hash'].encode('ascii') + b'\n')
+        else:
+            self.tree = node
+
+    def open_element(self, tag: str, token: str):
+        self.token(token)
+        if not self.build_tree:
+            if tag not in VOID_ELEMENTS:
+                self.open_tags.append(_Node(tag))
+            return
+        hasher = hashlib.sha256(token.encode('utf-8') + b'\n')
+        if tag in VOID_ELEMENTS:
+            self._attach({'tag': tag, 'hash': hasher.hexdigest()})
+        else:
+            self.open_tags.append(_Node(tag, hasher))
+
+    def close_element(self):
+        self.flush_text()
+        node = self.open_tags[-1]
+        self.hasher.update(f'</{node.tag}>\n'.encode('utf-8'))
+        self.open_tags.pop()
+        if self.build_tree:
+            element = {'tag': node.tag, 'hash': node.hasher.hexdigest()}
+            if node.children:
+                element['children'] = node.children
+            self._attach(element)
+
+    def text(self, data: str):
+        self.pending_text.append(data)
+
+    def flush_text(self):
+        if not self.pending_text:
+            return
+        data = ''.join(self.pending_text)
+        self.pending_text = []
+        collapsed = ' '.join(data.split())
+        if self.preview_len < PREVIEW_LENGTH:
+            # Indentation between tags shows up as a single line break
+            if not collapsed:
+                data = '' if self.preview_parts and self.preview_parts[-1].endswith('\n') else '\n'
+            self.preview_parts.append(data)
+            self.preview_len += len(data)
+        if collapsed:
+            self.token(escape(collapsed, quote=False))
+
+    def result(self) -> ZoneResult:
+        self.flush_text()
+        preview = ''.join(self.preview_parts)[:PREVIEW_LENGTH].strip()
+        return ZoneResult(self.hasher.hexdigest(), preview, self.tree)
+
+
+def _start_token(tag: str, attrs: List) -> str:
+    parts = [tag]
+    for name, value in attrs:
+        if value is None:
+            parts.append(name)
+        else:
+            parts.append(f'{name}="{escape(" ".join(value.split()))}"')
+    return '<' + ' '.join(parts) + '>'
+
+
+class ZoneExtractor(HTMLParser):
+    """Single-pass HTML tokenizer that hashes the subtrees of the given zone ids"""
+
+    def __init__(self, zone_ids: Iterable[str], build_tree: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.pending = set(zone_ids)
+        self.build_tree = build_tree
+        self.results: Dict[str, ZoneResult] = {}
+        self._active: List[_Capture] = []
+
+    @property
+    def done(self) -> bool:
+        return not self.pending and not self._active
+
+    def handle_starttag(self, tag, attrs):
+        token = None
+        if self._active:
+            token = _start_token(tag, attrs)
+            for capture in self._active:
+                capture.open_element(tag, token)
+
+        if self.pending:
+            zone_id = next((value for name, value in attrs if name == 'id'), None)
+            if zone_id in self.pending:
+                self.pending.discard(zone_id)
+                capture = _Capture(zone_id, self.build_tree)
+                capture.open_element(tag, token or _start_token(tag, attrs))
+                if capture.open_tags:
+                    self._active.append(capture)
+                else:
+                    self.results[zone_id] = capture.result()
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/> opens nothing; <div/> is treated as an empty element
+        if tag in VOID_ELEMENTS:
+            self.handle_starttag(tag, attrs)
+        else:
+            self.handle_starttag(tag, attrs)
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if not self._active:
+            return
+        still_open = []
+        for capture in self._active:
+            if any(node.tag == tag for node in capture.open_tags):
+                # Close implicitly ended elements along with the matching one
+                while capture.open_tags:
+                    closed_tag = capture.open_tags[-1].tag
+                    capture.close_element()
+                    if closed_tag == tag:
+                        break
+            if capture.open_tags:
+                still_open.append(capture)
+            else:
+                self.results[capture.zone_id] = capture.result()
+        self._active = still_open
+
+    def handle_data(self, data):
+        for capture in self._active:
+            capture.text(data)
+
+    def handle_comment(self, data):
+        if self._active:
+            token = f'<!--{" ".join(data.split())}-->'
+            for capture in self._active:
+                capture.token(token)
+
+    def close(self):
+        super().close()
+        # Zones left open at end of document are hashed as they stand
+        for capture in self._active:
+            while capture.open_tags:
+                capture.close_element()
+            self.results[capture.zone_id] = capture.result()
+        self._active = []
+
+
+def extract_zones(source: Union[str, Iterable[str]], zone_ids: Iterable[str],
+                  chunk_size: int = CHUNK_SIZE, build_tree: bool = False) -> Dict[str, ZoneResult]:
+    """Hash the given zones in one pass, stopping once all of them are closed
+
+    ``source`` is either the full document or an iterable of text chunks.
+    Zones missing from the document are absent from the result. With
+    ``build_tree`` each result also carries the zone's Merkle tree.
+    """
+    parser = ZoneExtractor(zone_ids, build_tree)
+    if isinstance(source, str):
+        chunks: Iterable[str] = (source[i:i + chunk_size] for i in range(0, len(source), chunk_size))
+    else:
+        chunks = source
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            return parser.results
+    parser.close()
+    return parser.results
+
+
+def diff_zone_trees(expected: Dict, current: Dict, path: str = '') -> List[Dict]:
+    """Return the elements that differ between two zone Merkle trees
+
+    Only subtrees whose hashes differ are descended into, so the work is
+    proportional to the size of the change rather than the size of the zone.
+    """
+    if expected['hash'] == current['hash']:
+        return []
+
+    path = path or current['tag']
+    expected_children = expected.get('children', [])
+    current_children = current.get('children', [])
+    changed = {
+        'path': path,
+        'expected_hash': expected['hash'],
+        'current_hash': current['hash'],
+    }
+    if expected['tag'] != current['tag'] or len(expected_children) != len(current_children):
+        # Elements were added, removed or replaced here
+        return [changed]
+
+    changes = []
+    for index, (old, new) in enumerate(zip(expected_children, current_children)):
+        if old['hash'] != new['hash']:
+            changes.extend(diff_zone_trees(old, new, f"{path} > {new['tag']}[{index}]"))
+    # Same children, so the element's own attributes or text changed
+    return changes or [changed]
+
+
+def zone_hash_version(baseline: Optional[Dict]) -> int:
+    """Zone hash version a baseline was created with (1 for legacy baselines)"""
+    return (baseline or {}).get('zone_hash_version', 1)
@@ -0,0 +1,53 @@
+"""
+Catalog endpoint throughput with and without the encoded-response cache.
+
+Drives the real app in-process through raw ASGI calls (see
+bench_middleware) with the response cache disabled and enabled. The
+sample catalog is replaced by a synthetic one of --services rows.
+
+    python -m benchmarks.bench_api_cache --services 1000 --requests 3000
+"""
+import argparse
+import asyncio
+
+from app.database import get_db
+from app.main import app
+from app.routes.api import response_cache
+from benchmarks.bench_database import synthetic_services
+from benchmarks.bench_middleware import run
+from benchmarks.common import write_results
+
+PATHS = [
+    "/api/departments",
+    "/api/services",
+    "/api/services?category=licensing&online_only=true",
+    "/api/services?limit=5",
+    "/api/stats",
+]
+
+
+async def main(services: int, requests: int):
+    if services:
+        get_db.get().load_services(synthetic_services(services, departments=6))
+    results = {"params": {"services": services, "requests": requests}}
+    for path in PATHS:
+        results[path] = {}
+        for enabled in (False, True):
+            response_cache.enabled = enabled
+            response_cache.clear()
+            results[path]["cached" if enabled else "uncached"] = await run(app, path, requests)
+        before, after = results[path]["uncached"], results[path]["cached"]
+        print(f"{path:>52}: {before['requests_per_s']:7.0f} -> {after['requests_per_s']:7.0f} req/s "
+              f"({after['requests_per_s'] / before['requests_per_s']:.1f}x), "
+              f"p99 {before['p99_ms']:.3f} -> {after['p99_ms']:.3f} ms")
+
+    path = write_results("api_cache", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--services", type=int, default=1000, help="0 keeps the 14 sample services")
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+    asyncio.run(main(args.services, args.requests))
@@ -0,0 +1,81 @@
+"""
+Event loop responsiveness while defacement checks are running.
+
+Runs a batch of concurrent checks against a local stand-in server, once
+through the blocking ``check_defacement`` and once through
+``check_defacement_async``, while a heartbeat task measures how late the
+loop wakes it up.
+
+    python -m benchmarks.bench_async_detector
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.defacement_detector import DefacementDetector
+from benchmarks.common import baseline_for, serve_pages, summarize, synthetic_page, write_results
+
+HEARTBEAT_INTERVAL = 0.01
+
+
+async def heartbeat(lags, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run_mode(mode: str, detector: DefacementDetector, baseline, url: str, checks: int):
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(heartbeat(lags, stop))
+
+    async def one_check():
+        if mode == "async":
+            return await detector.check_defacement_async(baseline, url)
+        return detector.check_defacement(baseline, url)
+
+    started = time.perf_counter()
+    reports = await asyncio.gather(*(one_check() for _ in range(checks)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    errors = sum(1 for r in reports if 'error' in r)
+    return {
+        "checks": checks,
+        "errors": errors,
+        "wall_s": elapsed,
+        "checks_per_s": checks / elapsed,
+        "loop_lag": summarize(lags),
+    }
+
+
+async def main(checks: int, delay: float, zone_kb: int, body_kb: int):
+    html = synthetic_page(zone_kb=zone_kb, body_kb=body_kb)
+    baseline = baseline_for(html)
+    results = {"params": {"checks": checks, "server_delay_s": delay, "page_bytes": len(html)}}
+
+    with serve_pages({"/": html}, delay=delay) as base_url:
+        for mode in ("blocking", "async"):
+            detector = DefacementDetector(max_workers=4)
+            results[mode] = await run_mode(mode, detector, baseline, base_url + "/", checks)
+            await detector.aclose()
+
+    for mode in ("blocking", "async"):
+        r = results[mode]
+        print(f"{mode:>8}: {r['checks_per_s']:7.1f} checks/s  "
+              f"loop lag p99 {r['loop_lag']['p99_ms']:7.1f} ms  max {r['loop_lag']['max_ms']:7.1f} ms  "
+              f"errors {r['errors']}")
+    print(f"results: {write_results('async_detector', results)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--checks", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.05, help="server response delay in seconds")
+    parser.add_argument("--zone-kb", type=int, default=4)
+    parser.add_argument("--body-kb", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(main(args.checks, args.delay, args.zone_kb, args.body_kb))
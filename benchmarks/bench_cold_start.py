@@ -0,0 +1,124 @@
+"""
+Cold start: import time, startup and time to first response in a fresh process.
+
+Each run starts a new interpreter (as a serverless instance would), imports
+app.main, runs the ASGI lifespan startup and then requests each path once,
+in order, through raw ASGI calls. The child reports its own timings and
+which heavy modules were loaded once startup finished and after the last
+request; the parent adds the wall time of the whole process, interpreter
+start included. Settings come from the environment as usual, except that
+the monitor and file watcher are off; set TEMPLATE_WARMUP=false to measure
+the serverless configuration.
+
+    python -m benchmarks.bench_cold_start --runs 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import summarize, write_results
+
+DEFAULT_PATHS = ["/health", "/api/departments", "/", "/api/defacement/baseline/status"]
+HEAVY_MODULES = ["requests", "httpx", "bs4", "jinja2", "multiprocessing"]
+
+# Runs in the child interpreter; keep imports ahead of the timed section minimal
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+import asyncio
+from benchmarks.bench_middleware import call
+
+def loaded():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+async def main(paths):
+    startup = asyncio.Event()
+    shutdown = asyncio.Event()
+    sent_startup = False
+
+    async def receive():
+        nonlocal sent_startup
+        if not sent_startup:
+            sent_startup = True
+            return {"type": "lifespan.startup"}
+        await shutdown.wait()
+        return {"type": "lifespan.shutdown"}
+
+    async def send(message):
+        if message["type"].startswith("lifespan.startup"):
+            startup.set()
+
+    t0 = time.perf_counter()
+    lifespan = asyncio.ensure_future(app({"type": "lifespan", "asgi": {"version": "3.0"}}, receive, send))
+    await startup.wait()
+    result = {"startup_ms": (time.perf_counter() - t0) * 1000, "first_response_ms": {}, "status": {}}
+    result["modules_at_startup"] = loaded()
+    for path in paths:
+        t0 = time.perf_counter()
+        result["status"][path] = await call(app, path)
+        result["first_response_ms"][path] = (time.perf_counter() - t0) * 1000
+    shutdown.set()
+    await lifespan
+    return result
+
+result = asyncio.run(main(sys.argv[1:]))
+result["import_ms"] = (imported - started) * 1000
+result["modules_at_end"] = loaded()
+print(json.dumps(result))
+"""
+
+
+def run_once(paths) -> dict:
+    env = dict(os.environ, MONITOR_ENABLED="false", WATCH_ENABLED="false")
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n{CHILD}"
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code, *paths], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main(runs: int, paths):
+    samples = [run_once(paths) for _ in range(runs)]
+    results = {
+        "params": {"runs": runs, "paths": paths},
+        "modules_at_startup": samples[-1]["modules_at_startup"],
+        "modules_at_end": samples[-1]["modules_at_end"],
+    }
+    for key in ("import_ms", "startup_ms", "process_ms"):
+        results[key] = summarize([s[key] / 1000 for s in samples])
+    results["first_response_ms"] = {
+        path: summarize([s["first_response_ms"][path] / 1000 for s in samples]) for path in paths
+    }
+    # Import and startup plus the first request, i.e. what the first caller waits for
+    results["time_to_first_response_ms"] = summarize([
+        (s["import_ms"] + s["startup_ms"] + s["first_response_ms"][paths[0]]) / 1000 for s in samples
+    ])
+
+    print(f"{'import':>40}: p50 {results['import_ms']['p50_ms']:7.1f} ms")
+    print(f"{'startup':>40}: p50 {results['startup_ms']['p50_ms']:7.1f} ms")
+    for path in paths:
+        status = samples[-1]["status"][path]
+        print(f"{'first ' + path:>40}: p50 {results['first_response_ms'][path]['p50_ms']:7.1f} ms ({status})")
+    print(f"{'time to first response':>40}: p50 {results['time_to_first_response_ms']['p50_ms']:7.1f} ms")
+    print(f"{'whole process':>40}: p50 {results['process_ms']['p50_ms']:7.1f} ms")
+    print(f"{'heavy modules after startup':>40}: {', '.join(results['modules_at_startup']) or 'none'}")
+    print(f"{'heavy modules after requests':>40}: {', '.join(results['modules_at_end']) or 'none'}")
+
+    path = write_results("cold_start", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS,
+                        help="Requested in order after startup; the first one is the time-to-first-response path")
+    args = parser.parse_args()
+    main(args.runs, args.paths)
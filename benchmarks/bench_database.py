@@ -0,0 +1,107 @@
+"""
+MockDatabase queries on a large synthetic catalog: linear scans vs. indexes.
+
+Builds a catalog of synthetic services (1M by default, created with
+``model_construct`` so validation does not dominate the setup), then times
+id lookups, filtered queries and the stats counters, both with the previous
+list-scan implementation and with the indexed MockDatabase.
+
+    python -m benchmarks.bench_database --services 1000000
+"""
+import argparse
+import random
+import time
+
+from app.database import MockDatabase
+from app.models import Service, ServiceCategory
+from benchmarks.common import measure, write_results
+
+CATEGORIES = list(ServiceCategory)
+
+
+def synthetic_services(count: int, departments: int):
+    rng = random.Random(42)
+    for service_id in range(1, count + 1):
+        yield Service.model_construct(
+            id=service_id,
+            name=f"Service {service_id}",
+            category=CATEGORIES[rng.randrange(len(CATEGORIES))],
+            description="Synthetic service",
+            department_id=rng.randint(1, departments),
+            processing_time="7 days",
+            fee=0.0,
+            is_online=rng.random() < 0.8,
+            requirements=[]
+        )
+
+
+class LinearScan:
+    """The previous MockDatabase queries, kept here as the reference point"""
+
+    def __init__(self, services):
+        self.services = services
+
+    def get_service_by_id(self, service_id):
+        return next((s for s in self.services if s.id == service_id), None)
+
+    def get_all_services(self, category=None, department_id=None, is_online=None):
+        services = self.services
+        if category:
+            services = [s for s in services if s.category == category]
+        if department_id:
+            services = [s for s in services if s.department_id == department_id]
+        if is_online is not None:
+            services = [s for s in services if s.is_online == is_online]
+        return services
+
+    def get_stats(self):
+        return {
+            "total_services": len(self.get_all_services()),
+            "online_services": len([s for s in self.get_all_services() if s.is_online]),
+        }
+
+
+def bench_queries(db, count: int, departments: int, repeat: int):
+    ids = random.Random(7).sample(range(1, count + 1), 100)
+    return {
+        "get_service_by_id_x100": measure(lambda: [db.get_service_by_id(i) for i in ids], repeat),
+        "filter_category": measure(lambda: db.get_all_services(category="licensing"), repeat),
+        "filter_department_online": measure(
+            lambda: db.get_all_services(department_id=departments // 2, is_online=False), repeat),
+        "filter_all_three": measure(
+            lambda: db.get_all_services(category="licensing", department_id=departments // 2, is_online=True),
+            repeat),
+        "stats": measure(db.get_stats, repeat),
+    }
+
+
+def main(count: int, departments: int, repeat: int):
+    started = time.perf_counter()
+    services = list(synthetic_services(count, departments))
+    built = time.perf_counter()
+    db = MockDatabase(services=services)
+    indexed = time.perf_counter()
+    results = {
+        "params": {"services": count, "departments": departments, "repeat": repeat},
+        "construct_s": built - started,
+        "index_build_s": indexed - built,
+        "linear_scan": bench_queries(LinearScan(services), count, departments, repeat),
+        "indexed": bench_queries(db, count, departments, repeat),
+    }
+
+    print(f"built {count} services in {results['construct_s']:.2f}s, indexed in {results['index_build_s']:.2f}s")
+    for query in results["indexed"]:
+        before = results["linear_scan"][query]["p50_ms"]
+        after = results["indexed"][query]["p50_ms"]
+        print(f"{query:>26}: {before:10.3f} ms -> {after:8.3f} ms")
+    path = write_results("database", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--services", type=int, default=1_000_000)
+    parser.add_argument("--departments", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.services, args.departments, args.repeat)
@@ -0,0 +1,102 @@
+"""
+Cost of a metrics observation, and of the metrics middleware per request.
+
+Times each recording call in a tight loop and reports nanoseconds per
+observation (the budget is 2 µs), then drives a small app with and without
+MetricsMiddleware to show the per-request overhead.
+
+    python -m benchmarks.bench_metrics --observations 1000000
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from app.middleware import MetricsMiddleware
+from app.utils.metrics import MetricsRegistry
+from benchmarks.bench_middleware import run
+from benchmarks.common import write_results
+
+BUDGET_NS = 2000
+
+
+def per_call_ns(func, observations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(observations):
+        func()
+    return (time.perf_counter() - started) / observations * 1e9
+
+
+def bench_observations(observations: int) -> dict:
+    registry = MetricsRegistry()
+    counter = registry.counter("bench_total", "Counter", ("type",))
+    gauge = registry.gauge("bench_in_flight", "Gauge")
+    histogram = registry.histogram("bench_seconds", "Histogram", ("method", "route", "status"))
+    series = histogram.labels("GET", "/api/services/{service_id}", "200")
+    zone = counter.labels("zone")
+
+    def gauge_inc_dec():
+        gauge.inc()
+        gauge.dec()
+
+    cases = {
+        "counter_inc_cached": lambda: zone.inc(),
+        "counter_labels_inc": lambda: counter.labels("zone").inc(),
+        "gauge_inc_dec": gauge_inc_dec,
+        "histogram_observe_cached": lambda: series.observe(0.0123),
+        "histogram_labels_observe": lambda: histogram.labels("GET", "/api/services/{service_id}", "200").observe(0.0123),
+    }
+    # The loop and lambda call are part of every case; subtract them
+    overhead = per_call_ns(lambda: None, observations)
+    results = {"loop_overhead_ns": overhead}
+    for name, func in cases.items():
+        results[name] = per_call_ns(func, observations) - overhead
+    # inc and dec are two observations
+    results["gauge_inc_dec"] /= 2
+    return results
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+    if with_metrics:
+        registry = MetricsRegistry()
+        app.add_middleware(
+            MetricsMiddleware,
+            duration=registry.histogram("http_request_duration_seconds", "Latency", ("method", "route", "status")),
+            in_flight=registry.gauge("http_requests_in_flight", "In flight")
+        )
+
+    @app.get("/time")
+    async def server_time():
+        return {"time": "2026-01-01T00:00:00", "timezone": "UTC"}
+
+    return app
+
+
+def main(observations: int, requests: int):
+    results = {"params": {"observations": observations, "requests": requests}}
+    results["observations_ns"] = bench_observations(observations)
+    for name, ns in results["observations_ns"].items():
+        flag = "" if name == "loop_overhead_ns" or ns < BUDGET_NS else "  OVER BUDGET"
+        print(f"{name:>26}: {ns:8.0f} ns{flag}")
+
+    results["middleware"] = {}
+    for variant, with_metrics in (("none", False), ("metrics", True)):
+        r = asyncio.run(run(build_app(with_metrics), "/time", requests))
+        results["middleware"][variant] = r
+        print(f"{'middleware ' + variant:>26}: {r['requests_per_s']:8.0f} req/s, p50 {r['p50_ms'] * 1000:.1f} µs")
+    overhead_us = (results["middleware"]["metrics"]["p50_ms"] - results["middleware"]["none"]["p50_ms"]) * 1000
+    results["middleware_overhead_us"] = overhead_us
+    print(f"{'middleware overhead':>26}: {overhead_us:8.1f} µs per request")
+
+    path = write_results("metrics", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--observations", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    main(args.observations, args.requests)
@@ -0,0 +1,118 @@
+"""
+SecurityHeadersMiddleware overhead: BaseHTTPMiddleware vs. plain ASGI.
+
+Drives the app in-process through raw ASGI calls (no sockets, no HTTP
+client) so the numbers reflect the middleware and routing only. Covers a
+static file and a small JSON route, each with no middleware, the previous
+BaseHTTPMiddleware implementation and the current plain ASGI one.
+
+    python -m benchmarks.bench_middleware --requests 5000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware import SecurityHeadersMiddleware
+from benchmarks.common import summarize, write_results
+
+
+class BaseHTTPSecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, kept here as the reference point"""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        response.headers["Content-Security-Policy"] = "default-src 'self' 'unsafe-inline' 'unsafe-eval'; img-src 'self' data: https:;"
+        response.headers["X-Request-ID"] = str(uuid.uuid4())
+        return response
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+    if variant == "base_http":
+        app.add_middleware(BaseHTTPSecurityHeadersMiddleware)
+    elif variant == "asgi":
+        app.add_middleware(SecurityHeadersMiddleware)
+    app.mount("/static", StaticFiles(directory="app/static"), name="static")
+
+    @app.get("/time")
+    async def server_time():
+        return {"time": "2026-01-01T00:00:00", "timezone": "UTC"}
+
+    return app
+
+
+async def call(app, path: str):
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = None
+    sent_request = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Responses that watch for a disconnect wait here until the call is over
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        done.set()
+    return status
+
+
+async def run(app, path: str, requests: int):
+    # Warm up routing and the middleware stack
+    for _ in range(100):
+        assert await call(app, path) == 200
+    samples = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        await call(app, path)
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    result = summarize(samples)
+    result["requests_per_s"] = requests / elapsed
+    return result
+
+
+async def main(requests: int):
+    results = {"params": {"requests": requests}}
+    for route, path in (("static", "/static/css/style.css"), ("json", "/time")):
+        results[route] = {}
+        for variant in ("none", "base_http", "asgi"):
+            results[route][variant] = await run(build_app(variant), path, requests)
+            r = results[route][variant]
+            print(f"{route:>6} {variant:>9}: {r['requests_per_s']:8.0f} req/s, p99 {r['p99_ms']:.3f} ms")
+
+    path = write_results("middleware", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
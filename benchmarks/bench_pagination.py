@@ -0,0 +1,64 @@
+"""
+Time-to-first-byte and peak memory of /api/services as the catalog grows.
+
+For each catalog size, compares serializing the whole collection as one
+ServiceListResponse against one cursor page and against the first chunk
+of the NDJSON stream. Full responses should grow with the catalog; the
+other two should stay flat.
+
+    python -m benchmarks.bench_pagination --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+
+from app.database import MockDatabase
+from app.models import ServiceListResponse
+from app.utils.pagination import ndjson_stream, paginate
+from benchmarks.bench_database import synthetic_services
+from benchmarks.common import measure, write_results
+
+PAGE_SIZE = 100
+
+
+def full_response(db: MockDatabase) -> bytes:
+    services = db.get_all_services(is_online=True)
+    return ServiceListResponse(total=len(services), services=services).model_dump_json().encode('utf-8')
+
+
+def first_page(db: MockDatabase) -> bytes:
+    services, next_cursor = paginate(db.iter_services(is_online=True), PAGE_SIZE)
+    return ServiceListResponse(
+        total=db.count_services(is_online=True), services=services, next_cursor=next_cursor
+    ).model_dump_json().encode('utf-8')
+
+
+def first_ndjson_chunk(db: MockDatabase) -> bytes:
+    async def first():
+        stream = ndjson_stream(db.iter_services(is_online=True))
+        chunk = await stream.__anext__()
+        await stream.aclose()
+        return chunk
+    return asyncio.run(first())
+
+
+def main(sizes, repeat: int):
+    results = {"params": {"sizes": sizes, "page_size": PAGE_SIZE, "repeat": repeat}}
+    for size in sizes:
+        db = MockDatabase(services=synthetic_services(size, departments=500))
+        results[str(size)] = {
+            "full_response": measure(lambda: full_response(db), repeat),
+            "cursor_page": measure(lambda: first_page(db), repeat),
+            "ndjson_first_chunk": measure(lambda: first_ndjson_chunk(db), repeat),
+        }
+        for mode, r in results[str(size)].items():
+            print(f"{size:>8} {mode:>18}: p50 {r['p50_ms']:9.2f} ms, peak {r['peak_kb']:10.0f} KB")
+    path = write_results("pagination", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
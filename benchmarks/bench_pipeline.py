@@ -0,0 +1,157 @@
+"""
+Per-stage timings and peak memory for the defacement pipeline.
+
+Generates synthetic pages and asset trees of increasing size, serves the
+pages from a local stand-in server and measures fetch, parse, normalize
+and hash stages as well as create_baseline and check_defacement end to
+end. Results are written to benchmarks/results/pipeline.json; pass
+--compare with an earlier results file to flag regressions.
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --compare previous.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+from app.services.baseline_manager import BaselineManager
+from app.services.defacement_detector import DefacementDetector
+from app.utils.hash_utils import RACY_WINDOW_NS, FileHashCache, calculate_file_hash, calculate_string_hash, normalize_html
+from app.utils.zone_extractor import extract_zones
+from benchmarks.common import make_asset_tree, measure, serve_pages, synthetic_page, write_results
+
+PAGE_SIZES_KB = [10, 100, 1024]
+ASSET_SIZES_KB = [32, 512, 4096]
+IMAGE_NAMES = ['logo1', 'image1', 'image2', 'image3']
+ZONES = BaselineManager.ZONES
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_page_stages(base_url: str, size_kb: int, repeat: int) -> dict:
+    url = f"{base_url}/page-{size_kb}"
+    html = requests.get(url).text
+    session = requests.Session()
+    return {
+        "page_bytes": len(html),
+        "fetch": measure(lambda: session.get(url).text, repeat),
+        "parse_streaming": measure(lambda: extract_zones(html, ZONES), repeat),
+        "parse_streaming_tree": measure(lambda: extract_zones(html, ZONES, build_tree=True), repeat),
+        "parse_beautifulsoup": measure(lambda: DefacementDetector._legacy_zone_hashes(html, ZONES), repeat),
+        "normalize_html": measure(lambda: normalize_html(html), repeat),
+        "calculate_string_hash": measure(lambda: calculate_string_hash(html), repeat),
+        "zones_found": sorted(extract_zones(html, ZONES)),
+    }
+
+
+def bench_asset_stages(static_dir: Path, size_kb: int, repeat: int) -> dict:
+    path = static_dir / "images" / "image1.png"
+    cache = FileHashCache()
+    cache.get_hash(path)
+    return {
+        "file_bytes": path.stat().st_size,
+        "calculate_file_hash": measure(lambda: calculate_file_hash(path), repeat),
+        "calculate_file_hash_cached": measure(lambda: calculate_file_hash(path, cache=cache), repeat),
+    }
+
+
+def bench_end_to_end(base_url: str, page_kb: int, static_dir: Path, data_dir: Path, repeat: int) -> dict:
+    url = f"{base_url}/page-{page_kb}"
+    manager = BaselineManager(data_dir=str(data_dir))
+    detector = DefacementDetector(conditional_get=False)
+    baseline = manager.create_baseline(url, static_dir=str(static_dir))
+    return {
+        "create_baseline": measure(lambda: manager.create_baseline(url, static_dir=str(static_dir)), repeat),
+        "check_defacement": measure(lambda: detector.check_defacement(baseline, url, str(static_dir)), repeat),
+    }
+
+
+def compare(previous_path: Path, current: dict, threshold: float) -> list:
+    """List stages whose median got slower than threshold compared to a previous run"""
+    with open(previous_path) as f:
+        previous = json.load(f)
+
+    regressions = []
+
+    def walk(old, new, path):
+        if isinstance(new, dict) and "p50_ms" in new and isinstance(old, dict) and old.get("p50_ms"):
+            ratio = new["p50_ms"] / old["p50_ms"]
+            if ratio > 1 + threshold:
+                regressions.append((path, old["p50_ms"], new["p50_ms"], ratio))
+        elif isinstance(new, dict) and isinstance(old, dict):
+            for key in new:
+                if key in old:
+                    walk(old[key], new[key], f"{path}/{key}" if path else key)
+
+    walk(previous.get("stages", {}), current["stages"], "")
+    return regressions
+
+
+def main(repeat: int, compare_with, threshold: float):
+    # Fetch pages over HTTP for baselines too, as in production
+    os.environ["PRODUCTION"] = "true"
+    pages = {f"/page-{kb}": synthetic_page(zone_kb=2, body_kb=kb) for kb in PAGE_SIZES_KB}
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "stages": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp, serve_pages(pages) as base_url:
+        for kb in PAGE_SIZES_KB:
+            results["stages"][f"page/{kb}KB"] = bench_page_stages(base_url, kb, repeat)
+
+        static_dirs = {
+            kb: make_asset_tree(Path(tmp) / f"static-{kb}", {f"images/{name}.png": kb for name in IMAGE_NAMES})
+            for kb in ASSET_SIZES_KB
+        }
+        # Freshly written files are never cached, so let them age past the racy window
+        time.sleep(RACY_WINDOW_NS / 1e9)
+
+        for kb, static_dir in static_dirs.items():
+            results["stages"][f"asset/{kb}KB"] = bench_asset_stages(static_dir, kb, repeat)
+            results["stages"][f"end_to_end/{kb}KB-assets"] = bench_end_to_end(
+                base_url, PAGE_SIZES_KB[1], static_dir, Path(tmp) / f"data-{kb}", repeat
+            )
+
+    for group, stages in results["stages"].items():
+        for stage, timing in stages.items():
+            if isinstance(timing, dict) and "p50_ms" in timing:
+                print(f"{group:>26} {stage:<28} p50 {timing['p50_ms']:9.3f} ms  peak {timing['peak_kb']:9.1f} KB")
+    print(f"results: {write_results('pipeline', results)}")
+
+    if compare_with:
+        regressions = compare(Path(compare_with), results, threshold)
+        for path, old, new, ratio in regressions:
+            print(f"REGRESSION {path}: {old:.3f} ms -> {new:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare", help="earlier pipeline.json to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+    main(args.repeat, args.compare, args.threshold)
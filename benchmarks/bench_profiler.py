@@ -0,0 +1,55 @@
+"""
+Overhead of the sampling profiler on CPU-bound request work.
+
+Times zone extraction of a synthetic page with no profiler attached and
+with SamplingProfiler sampling the thread at several intervals, and
+reports the slowdown and the number of samples taken.
+
+    python -m benchmarks.bench_profiler --intervals 0.001 0.005 0.01
+"""
+import argparse
+
+from app.utils.profiler import SamplingProfiler
+from app.utils.zone_extractor import extract_zones
+from benchmarks.common import measure, synthetic_page, write_results
+
+ZONES = ["header", "sidebar", "footer"]
+
+
+def main(intervals, page_kb: int, iterations: int, repeat: int):
+    html = synthetic_page(zone_kb=page_kb // 4, body_kb=page_kb)
+
+    def work():
+        for _ in range(iterations):
+            extract_zones(html, ZONES, build_tree=True)
+
+    results = {"params": {"page_kb": page_kb, "iterations": iterations, "repeat": repeat}}
+    results["none"] = measure(work, repeat)
+    base = results["none"]["p50_ms"]
+    print(f"{'no profiler':>16}: p50 {base:9.2f} ms")
+
+    for interval in intervals:
+        profiler = SamplingProfiler(interval=interval)
+        profiler.start()
+        try:
+            r = measure(work, repeat)
+        finally:
+            profiler.stop()
+        r["samples"] = profiler.samples
+        r["overhead_pct"] = (r["p50_ms"] / base - 1) * 100
+        results[f"interval_{interval}"] = r
+        print(f"{f'every {interval * 1000:g} ms':>16}: p50 {r['p50_ms']:9.2f} ms "
+              f"({r['overhead_pct']:+.1f}%), {profiler.samples} samples")
+
+    path = write_results("profiler", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--intervals", type=float, nargs="+", default=[0.001, 0.005, 0.01])
+    parser.add_argument("--page-kb", type=int, default=64)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+    main(args.intervals, args.page_kb, args.iterations, args.repeat)
@@ -0,0 +1,119 @@
+"""
+/api/search index: build time, query latency and incremental updates on a large catalog.
+
+Builds a synthetic catalog whose names, descriptions and requirements are
+drawn from a Zipf-distributed vocabulary, indexes it through CatalogSearch,
+then times exact, prefix, typo and multi-word queries, and single-row
+add/update/remove reindexing.
+
+    python -m benchmarks.bench_search --services 300000
+"""
+import argparse
+import itertools
+import random
+import time
+
+from app.database import MockDatabase
+from app.models import Department, Service, ServiceCategory
+from app.services.search_index import CatalogSearch
+from benchmarks.common import measure, write_results
+
+CATEGORIES = list(ServiceCategory)
+SYLLABLES = ["li", "cen", "per", "mit", "reg", "is", "tra", "tion", "cert", "if", "ic", "ate",
+             "pass", "port", "tax", "ben", "e", "fit", "hous", "ing", "land", "rec", "ord", "vis"]
+
+
+def vocabulary(size: int, rng: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def synthetic_catalog(count: int, departments: int, vocab_size: int):
+    rng = random.Random(42)
+    words = vocabulary(vocab_size, rng)
+    # Zipf-like: common words appear in many rows, the long tail in few
+    weights = list(itertools.accumulate(1.0 / rank for rank in range(1, len(words) + 1)))
+
+    def phrase(n: int) -> str:
+        return " ".join(rng.choices(words, cum_weights=weights, k=n))
+
+    depts = [
+        Department.model_construct(id=i, name=f"Department of {phrase(2)}", category="government",
+                                   description=phrase(12), head="Head", email="dept@gov.example",
+                                   phone="+1-555-0100", address="Capital City")
+        for i in range(1, departments + 1)
+    ]
+    services = [
+        Service.model_construct(id=i, name=phrase(3), category=CATEGORIES[i % len(CATEGORIES)],
+                                description=phrase(10), department_id=rng.randint(1, departments),
+                                processing_time="7 days", fee=0.0, is_online=True,
+                                requirements=[phrase(2) for _ in range(3)])
+        for i in range(1, count + 1)
+    ]
+    return depts, services, words
+
+
+def main(count: int, departments: int, vocab_size: int, max_total: int, repeat: int):
+    depts, services, words = synthetic_catalog(count, departments, vocab_size)
+    db = MockDatabase(departments=depts, services=services)
+    search = CatalogSearch(max_total=max_total)
+    started = time.perf_counter()
+    search.attach(db)
+    build_s = time.perf_counter() - started
+
+    # Pick query words by how many documents contain them
+    index = search.indexes["service"]
+    by_frequency = sorted(words, key=lambda w: index._df.get(w, 0), reverse=True)
+    common, mid, rare = by_frequency[0], by_frequency[len(by_frequency) // 10], by_frequency[-1]
+    typo = mid[:2] + mid[3:] if len(mid) > 4 else mid + "x"
+    queries = {
+        "exact_common": common,
+        "exact_mid": mid,
+        "exact_rare": rare,
+        "prefix": mid[:3],
+        "typo": typo,
+        "two_words": f"{mid} {common}",
+        "two_words_prefix": f"{mid} {common[:3]}",
+    }
+
+    results = {
+        "params": {"services": count, "departments": departments, "vocabulary": vocab_size,
+                   "max_total": max_total, "repeat": repeat},
+        "build_s": build_s,
+        "queries": {},
+    }
+    print(f"indexed {len(index)} services in {build_s:.2f}s")
+    for name, query in queries.items():
+        _, total, exact = search.search(query)
+        r = measure(lambda: search.search(query), repeat)
+        r.update({"query": query, "matches": total, "exact": exact})
+        results["queries"][name] = r
+        matches = f"{total}{'' if exact else '+'}"
+        print(f"{name:>18} {query!r:>28}: {matches:>8} matches, p50 {r['p50_ms']:7.2f} ms")
+
+    next_id = itertools.count(count + 1)
+    template = services[0]
+
+    def add_update_remove():
+        service_id = next(next_id)
+        db.add_service(template.model_copy(update={"id": service_id}))
+        db.update_service(template.model_copy(update={"id": service_id, "name": "renamed service"}))
+        db.remove_service(service_id)
+
+    results["add_update_remove"] = measure(add_update_remove, repeat * 10)
+    print(f"{'add+update+remove':>18}: p50 {results['add_update_remove']['p50_ms']:7.3f} ms")
+    path = write_results("search", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--services", type=int, default=300_000)
+    parser.add_argument("--departments", type=int, default=500)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--max-total", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.services, args.departments, args.vocabulary, args.max_total, args.repeat)
@@ -0,0 +1,80 @@
+"""
+Crawl baseline verification: in-process snapshot vs. process-pool shards.
+
+Serves a synthetic site from a local stand-in server, records a crawl
+baseline of it and then checks it through ``check_site_async`` with
+sharding disabled and enabled. One page is modified before the last run
+to make sure both paths report the same change.
+
+    python -m benchmarks.bench_sharded_verifier --pages 2000 --workers 4
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.baseline_manager import BaselineManager
+from app.services.defacement_detector import DefacementDetector
+from benchmarks.common import serve_pages, synthetic_page, write_results
+
+
+def build_site(pages: int, zone_kb: int, body_kb: int):
+    site = {}
+    template = synthetic_page(zone_kb=zone_kb, body_kb=body_kb)
+    links = ''.join(f'<a href="/page/{i}">{i}</a>' for i in range(pages))
+    site['/'] = template.replace('</body>', f'<nav>{links}</nav></body>')
+    for i in range(pages):
+        site[f'/page/{i}'] = template.replace('</body>', f'<p>page {i}</p></body>')
+    return site
+
+
+async def check(baseline, shard_threshold: int, workers: int, repeat: int):
+    detector = DefacementDetector(shard_threshold=shard_threshold, process_workers=workers)
+    try:
+        # The first run also starts the worker processes
+        started = time.perf_counter()
+        report = await detector.check_defacement_async(baseline, baseline['url'])
+        warmup = time.perf_counter() - started
+
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            report = await detector.check_defacement_async(baseline, baseline['url'])
+            samples.append(time.perf_counter() - started)
+        return report, {"warmup_s": warmup, "best_s": min(samples, default=warmup), "timings": report.get('timings')}
+    finally:
+        await detector.aclose()
+
+
+async def main(pages: int, workers: int, repeat: int, zone_kb: int, body_kb: int):
+    site = build_site(pages, zone_kb, body_kb)
+    results = {"params": {"pages": pages + 1, "workers": workers, "page_bytes": len(site['/page/0'])}}
+
+    with serve_pages(site) as base_url:
+        manager = BaselineManager(data_dir="benchmarks/results/sharded_data")
+        baseline = await manager.create_crawl_baseline(base_url + '/', max_pages=pages + 1)
+
+        _, results["in_process"] = await check(baseline, 0, workers, repeat)
+        _, results["sharded"] = await check(baseline, 1, workers, repeat)
+
+        site['/page/0'] = site['/page/0'].replace('id="sidebar">', 'id="sidebar"><p>defaced</p>')
+        for name, threshold in (("in_process", 0), ("sharded", 1)):
+            report, _ = await check(baseline, threshold, workers, 0)
+            results[name]["detected_after_edit"] = [change.get('page') for change in report['changes']]
+
+    for name in ("in_process", "sharded"):
+        print(f"{name:>10}: best {results[name]['best_s']:.3f}s, "
+              f"warmup {results[name]['warmup_s']:.3f}s, detected {results[name]['detected_after_edit']}")
+    print(f"speedup: {results['in_process']['best_s'] / results['sharded']['best_s']:.2f}x")
+    path = write_results("sharded_verifier", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--zone-kb", type=int, default=4)
+    parser.add_argument("--body-kb", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.workers, args.repeat, args.zone_kb, args.body_kb))
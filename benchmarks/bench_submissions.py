@@ -0,0 +1,63 @@
+"""
+Contact submission spike: latency and throughput of the write-behind store.
+
+Fires a burst of concurrent submissions at a SubmissionStore writing to a
+temporary file, once with one fsync per record (batch size 1) and once
+with group commit, and checks that every record made it to disk.
+
+    python -m benchmarks.bench_submissions --burst 2000
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from app.models import ContactForm
+from app.services.submission_store import SubmissionStore
+from benchmarks.common import summarize, write_results
+
+FORM = ContactForm(
+    name="Benchmark User",
+    email="bench@example.com",
+    subject="Announcement follow-up",
+    message="Submitted by the contact submission benchmark."
+)
+
+
+async def burst(store: SubmissionStore, count: int):
+    async def one():
+        started = time.perf_counter()
+        await store.submit(FORM)
+        return time.perf_counter() - started
+
+    store.start()
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(count)))
+    elapsed = time.perf_counter() - started
+    await store.stop()
+
+    with open(store.path, 'rb') as f:
+        written = sum(1 for _ in f)
+    result = summarize(latencies)
+    result.update({"submissions_per_s": count / elapsed, "written": written})
+    return result
+
+
+async def main(count: int):
+    results = {"params": {"burst": count}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, batch_size in (("fsync_per_record", 1), ("group_commit", 256)):
+            store = SubmissionStore(str(Path(tmp) / f"{name}.jsonl"), batch_size=batch_size)
+            results[name] = r = await burst(store, count)
+            print(f"{name:>16}: {r['submissions_per_s']:8.0f}/s, p50 {r['p50_ms']:.1f} ms, "
+                  f"p99 {r['p99_ms']:.1f} ms, {r['written']}/{count} on disk")
+    path = write_results("submissions", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.burst))
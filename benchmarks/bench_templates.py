@@ -0,0 +1,53 @@
+"""
+Template compile and render cost for local baselines.
+
+Compares a fresh Environment per BaselineManager (the old behaviour)
+against a cold start that loads bytecode from the filesystem cache and
+against the shared, already-warm environment.
+
+    python -m benchmarks.bench_templates
+"""
+import argparse
+import tempfile
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app.templating import TEMPLATE_DIR, render_templates
+from benchmarks.common import measure, write_results
+
+CONTEXT = {'request': {'url': '/'}}
+
+
+def render_all(env: Environment, names):
+    return {name: env.get_template(name).render(CONTEXT) for name in names}
+
+
+def main(repeat: int):
+    names = Environment(loader=FileSystemLoader(TEMPLATE_DIR)).list_templates(extensions=['html'])
+    cache_dir = tempfile.mkdtemp(prefix="bench-jinja-")
+    # Fill the bytecode cache once, as an earlier process would have
+    render_all(Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                           bytecode_cache=FileSystemBytecodeCache(cache_dir)), names)
+    render_templates(names, CONTEXT)
+
+    results = {
+        "params": {"templates": names, "repeat": repeat},
+        "fresh_environment": measure(
+            lambda: render_all(Environment(loader=FileSystemLoader(TEMPLATE_DIR)), names), repeat),
+        "fresh_environment_bytecode_cache": measure(
+            lambda: render_all(Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                                           bytecode_cache=FileSystemBytecodeCache(cache_dir)), names), repeat),
+        "shared_environment": measure(lambda: render_templates(names, CONTEXT), repeat),
+    }
+
+    for name in ("fresh_environment", "fresh_environment_bytecode_cache", "shared_environment"):
+        print(f"{name:>34}: p50 {results[name]['p50_ms']:.2f} ms")
+    path = write_results("templates", results)
+    print(f"results written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.repeat)
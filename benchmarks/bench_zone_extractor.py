@@ -0,0 +1,59 @@
+"""
+Zone hashing: BeautifulSoup full-DOM path against the streaming extractor.
+
+Pages range from 10 KB to 10 MB. ``zones-first`` puts all protected zones
+ahead of the bulk of the body so the extractor can stop early;
+``footer-last`` keeps the footer at the end of the document.
+
+    python -m benchmarks.bench_zone_extractor
+"""
+import argparse
+import time
+
+from app.services.defacement_detector import DefacementDetector
+from app.utils.zone_extractor import extract_zones
+from benchmarks.common import summarize, synthetic_page, write_results
+
+ZONES = ['header', 'sidebar', 'footer']
+SIZES_KB = [10, 100, 1024, 10 * 1024]
+
+
+def zones_first_page(body_kb: int) -> str:
+    page = synthetic_page(zone_kb=2, body_kb=body_kb)
+    start = page.index('<main id="main-content">')
+    end = page.index('</main>') + len('</main>')
+    footer_start = page.index('<footer id="footer">')
+    footer_end = page.index('</footer>') + len('</footer>')
+    return page[:start] + page[footer_start:footer_end] + page[start:end] + page[end:footer_start] + page[footer_end:]
+
+
+def time_it(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def main(repeat: int):
+    results = {}
+    for layout, make_page in (("footer-last", lambda kb: synthetic_page(zone_kb=2, body_kb=kb)),
+                              ("zones-first", zones_first_page)):
+        for size_kb in SIZES_KB:
+            html = make_page(size_kb)
+            runs = max(1, repeat if size_kb < 1024 else repeat // 5)
+            legacy = time_it(lambda: DefacementDetector._legacy_zone_hashes(html, ZONES), runs)
+            streaming = time_it(lambda: extract_zones(html, ZONES), runs)
+            key = f"{layout}/{size_kb}KB"
+            results[key] = {"page_bytes": len(html), "beautifulsoup": legacy, "streaming": streaming}
+            print(f"{key:>20}: bs4 {legacy['p50_ms']:9.2f} ms  streaming {streaming['p50_ms']:9.2f} ms  "
+                  f"speedup {legacy['p50_ms'] / streaming['p50_ms']:6.1f}x")
+    print(f"results: {write_results('zone_extractor', results)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.repeat)
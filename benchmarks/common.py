@@ -0,0 +1,145 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import json
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def synthetic_page(zone_kb: int = 2, body_kb: int = 8) -> str:
+    """Build a page with header/sidebar/footer zones of roughly the given size"""
+    def filler(prefix: str, kb: int) -> str:
+        item = f'<li><a href="/{prefix}">{prefix} link</a> <span class="note">entry</span></li>\n'
+        return item * max(1, (kb * 1024) // len(item))
+
+    return (
+        '<!DOCTYPE html>\n<html lang="en">\n<head><title>Benchmark</title></head>\n<body>\n'
+        f'<header id="header"><h1>National Information Portal</h1><ul>{filler("header", zone_kb)}</ul></header>\n'
+        f'<aside id="sidebar"><nav><ul>{filler("sidebar", zone_kb)}</ul></nav></aside>\n'
+        f'<main id="main-content"><ul>{filler("main", body_kb)}</ul></main>\n'
+        f'<footer id="footer"><p>&copy; 2026 Government Portal.</p><ul>{filler("footer", zone_kb)}</ul></footer>\n'
+        '</body>\n</html>\n'
+    )
+
+
+@contextmanager
+def serve_pages(pages: Dict[str, str], delay: float = 0.0):
+    """Serve the given path -> HTML mapping from a local stand-in server"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = pages.get(self.path.split('?')[0])
+            if delay:
+                time.sleep(delay)
+            if body is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summary statistics (in milliseconds) for a list of durations in seconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def write_results(name: str, results: Dict) -> Path:
+    """Save benchmark results as JSON so runs can be compared across releases"""
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{name}.json"
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def baseline_for(html: str, static_dir: str = "app/static") -> Dict:
+    """Build a baseline dict for a page the same way BaselineManager does"""
+    from bs4 import BeautifulSoup
+    from app.utils.hash_utils import calculate_string_hash, calculate_file_hash, normalize_html
+
+    soup = BeautifulSoup(html, 'html.parser')
+    baseline = {"url": None, "zones": {}, "images": {}}
+    for zone_id in ['header', 'sidebar', 'footer']:
+        element = soup.find(id=zone_id)
+        if element:
+            baseline['zones'][zone_id] = {
+                'hash': calculate_string_hash(normalize_html(str(element))),
+                'content_preview': element.get_text()[:100].strip()
+            }
+    for path in sorted(Path(static_dir, "images").glob("*.png")):
+        baseline['images'][path.stem] = {
+            'path': f'/static/images/{path.name}',
+            'hash': calculate_file_hash(path),
+            'size': path.stat().st_size
+        }
+    return baseline
+
+
+def measure(func, repeat: int = 5) -> Dict:
+    """Time func over several runs and record peak traced memory of one run"""
+    import tracemalloc
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = summarize(samples)
+    result["peak_kb"] = peak / 1024
+    return result
+
+
+def make_asset_tree(root: Path, sizes_kb: Dict[str, int]) -> Path:
+    """Write files of the given sizes (relative path -> KB) under root"""
+    import os
+
+    for rel_path, size_kb in sizes_kb.items():
+        path = Path(root) / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(os.urandom(size_kb * 1024))
+    return Path(root)
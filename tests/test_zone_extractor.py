@@ -0,0 +1,38 @@
+from app.utils.zone_extractor import CHUNK_SIZE, extract_zones
+
+FOOTER = (
+    '<footer id="footer">\n'
+    '    <p>Copyright &copy; 2024   Government   Portal.\n      All rights reserved.</p>\n'
+    '    <!-- contact -->\n'
+    '    <a href="/contact">Contact   us</a> and some trailing footer text\n'
+    '</footer>'
+)
+
+
+def _page(padding: int) -> str:
+    return f'<html><body><main>{"x" * padding}</main>{FOOTER}</body></html>'
+
+
+def _chunks(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_zone_hash_does_not_depend_on_chunk_boundaries():
+    page = _page(100)
+    expected = extract_zones([page], ['footer'], build_tree=True)['footer']
+
+    for size in (1, 2, 3, 7, 16, 61, 64 * 1024):
+        result = extract_zones(_chunks(page, size), ['footer'], build_tree=True)['footer']
+        assert result.hash == expected.hash, size
+        assert result.tree == expected.tree, size
+        assert result.preview == expected.preview, size
+
+
+def test_zone_hash_does_not_depend_on_content_before_the_zone():
+    # Paddings that move the default chunk boundary through every part of the footer
+    prefix = len(_page(0)) - len(FOOTER) - len('</body></html>')
+    paddings = range(CHUNK_SIZE - prefix - len(FOOTER), CHUNK_SIZE - prefix + 1)
+    hashes = {extract_zones(_page(padding), ['footer'], build_tree=True)['footer'].hash for padding in paddings}
+    hashes.add(extract_zones([_page(0)], ['footer'])['footer'].hash)
+
+    assert len(hashes) == 1